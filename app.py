@@ -1,5 +1,17 @@
 import streamlit as st
-from news_video import VideoGenerator
+from metrics import start_metrics_server
+from job_manager import JobManager
+from circuit_breaker import CircuitBreaker
+from avatar_registry import AvatarRegistry
+from presenter_catalog import PresenterCatalog
+from talk_store import TalkStore
+from talk_events import Done, Failed, Retry, StatusChanged, Submitted
+from clip_library import INTRO_TEXT, OUTRO_TEXT, ClipLibrary, styled_script
+from deadline import within
+from news_video import AsyncVideoGenerator, VideoGenerator
+from render_cache import RenderCache
+from retry_policy import RetryPolicy
+from segmented_render import SegmentedRenderer
 from dotenv import load_dotenv
 import os
 
@@ -7,7 +19,181 @@ load_dotenv()
 
 # Load video API key from environment
 video_api_key = os.getenv("BEARER_TOKEN")
-video_generator = VideoGenerator(video_api_key)
+
+
+@st.cache_resource
+def get_circuit_breaker():
+    """Avatar/endpoint health shared by all sessions and kept across restarts"""
+    return CircuitBreaker(db_path=".circuit_breaker.sqlite3")
+
+
+@st.cache_resource
+def get_avatar_registry():
+    """Avatar images are uploaded to D-ID once and then referenced by their hosted URL"""
+    return AvatarRegistry()
+
+
+@st.cache_resource
+def get_presenter_catalog(api_key):
+    """Presenter list shared by all sessions, kept on disk and refreshed in the background"""
+    generator = VideoGenerator(api_key)
+    return PresenterCatalog(generator.fetch_presenters, cache_path=".presenters.json", seed=generator.presenters)
+
+
+@st.cache_resource
+def get_retry_policy():
+    """One retry policy, and so one retry budget, for every render in the process"""
+    return RetryPolicy()
+
+
+@st.cache_resource
+def get_talk_store():
+    """Submitted talk IDs, kept so a restart resumes renders instead of paying for them again"""
+    return TalkStore()
+
+
+@st.cache_resource
+def get_render_cache():
+    """Identical script/voice/style/avatar combinations are served from this local cache"""
+    return RenderCache()
+
+
+@st.cache_resource
+def get_video_generator(api_key):
+    """
+    One generator shared by all sessions and reruns.
+
+    Avatars that keep failing are skipped in favour of their fallbacks for a while.
+    """
+    return VideoGenerator(api_key, render_cache=get_render_cache(),
+                          circuit_breaker=get_circuit_breaker(),
+                          avatar_registry=get_avatar_registry(),
+                          presenter_catalog=get_presenter_catalog(api_key),
+                          talk_store=get_talk_store(),
+                          retry_policy=get_retry_policy())
+
+
+@st.cache_resource
+def get_clip_library(api_key):
+    """Intro/outro are rendered once per voice/style/avatar and joined on locally"""
+    return ClipLibrary(get_video_generator(api_key))
+
+
+video_generator = get_video_generator(video_api_key)
+clip_library = get_clip_library(video_api_key)
+
+
+@st.cache_resource
+def start_metrics(port):
+    """Expose /metrics for Prometheus once per process"""
+    return start_metrics_server(port)
+
+
+# Set METRICS_PORT to export phase timings (submit, poll, render, download...) to Prometheus
+if os.getenv("METRICS_PORT"):
+    start_metrics(int(os.getenv("METRICS_PORT")))
+
+
+@st.cache_resource
+def get_segmented_renderer(api_key):
+    """One segmented renderer (and its HTTP thread pool) shared by all sessions"""
+    return SegmentedRenderer(AsyncVideoGenerator(api_key, render_cache=get_render_cache(),
+                                                 circuit_breaker=get_circuit_breaker(),
+                                                 avatar_registry=get_avatar_registry(),
+                                                 presenter_catalog=get_presenter_catalog(api_key),
+                                                 talk_store=get_talk_store(),
+                                                 retry_policy=get_retry_policy()))
+
+
+@st.cache_resource
+def get_job_manager():
+    """Background render pool shared by all sessions, so a render never blocks the page"""
+    return JobManager(max_workers=int(os.getenv("RENDER_WORKERS", "4")))
+
+
+@st.cache_resource
+def resume_outstanding_talks():
+    """Once per process: collect talks a previous run submitted but never finished polling"""
+    return get_job_manager().submit(lambda progress: video_generator.resume_outstanding(),
+                                    description="Resume outstanding talks")
+
+
+resume_outstanding_talks()
+
+
+def render_news_video(progress, script, avatar_url, voice_id, fallback_urls=None, style_name="default",
+                      language_code="en", add_intro=False, add_outro=False, use_clip_library=False,
+                      segmented_renderer=None, budget=None):
+    """
+    Render a bulletin on a JobManager worker thread.
+
+    Tries the primary avatar with the fallbacks hedged alongside it, then joins the
+    library intro/outro on. Must not call Streamlit; status goes through the
+    progress callback.
+
+    Args:
+        budget: Optional total seconds for the render and clip assembly; the job fails
+                with DeadlineExceeded once it runs out
+
+    Returns:
+        dict with video_url (None on failure), avatar_url_used, fallback_used and clips_failed
+    """
+    if budget is not None:
+        with within(budget):
+            return render_news_video(progress, script, avatar_url, voice_id, fallback_urls, style_name,
+                                     language_code, add_intro, add_outro, use_clip_library, segmented_renderer)
+
+    primary_url = avatar_url
+    if segmented_renderer:
+        progress("Rendering script segments in parallel")
+        video_url = segmented_renderer.render(script, avatar_url, voice_id)
+        # Fallbacks are hedged with each other once the segmented render has failed
+        if not video_url and fallback_urls:
+            progress("Primary avatar failed, trying fallback options")
+            # The primary may be listed among its own fallbacks; it has already failed
+            fallback_urls = [url for url in fallback_urls if url != avatar_url]
+            video_url, avatar_url = video_generator.generate_video_hedged(script, fallback_urls, voice_id)
+    elif fallback_urls:
+        # Fallback avatars start alongside the primary if it fails or is slow
+        video_url, avatar_url = video_generator.generate_video_hedged(
+            script, [avatar_url] + list(fallback_urls), voice_id
+        )
+    else:
+        video_url = None
+        # Follow the talk's events so the page shows D-ID's own status as it changes
+        for event in video_generator.stream_video(script, avatar_url, voice_id):
+            if isinstance(event, Submitted):
+                progress(f"Submitted to D-ID (talk {event.talk_id})")
+            elif isinstance(event, StatusChanged):
+                progress(f"D-ID status: {event.status}")
+            elif isinstance(event, Retry):
+                progress(f"D-ID call failed ({event.reason}), retrying in {event.delay:.0f}s")
+            elif isinstance(event, Done):
+                video_url = event.result_url
+            elif isinstance(event, Failed):
+                progress(f"Render failed: {event.error}")
+    
+    fallback_used = bool(video_url) and avatar_url != primary_url
+    
+    clips_failed = False
+    if video_url and use_clip_library:
+        progress("Attaching intro/outro clips")
+        assembled = clip_library.assemble(
+            video_url, language_code, voice_id, style_name,
+            source_url=avatar_url, intro=add_intro, outro=add_outro
+        )
+        if assembled:
+            video_url = assembled
+        else:
+            clips_failed = True
+    
+    return {
+        "video_url": video_url,
+        "avatar_url_used": avatar_url or primary_url,
+        "fallback_used": fallback_used,
+        "clips_failed": clips_failed,
+    }
+
 
 # Page configuration
 st.set_page_config(page_title="AI News Anchor", layout="wide")
@@ -60,11 +246,8 @@ with col1:
     # Show API status
     if st.button("🔧 Test D-ID Connection", help="Check if D-ID API is working"):
         with st.spinner("Testing API..."):
-            import requests
-            test_url = "https://api.d-id.com/credits"
-            auth = f"Basic {video_api_key}" if ':' in video_api_key else f"Bearer {video_api_key}"
             try:
-                resp = requests.get(test_url, headers={"authorization": auth})
+                resp = video_generator.get_credits()
                 if resp.status_code == 200:
                     st.success("✅ API Connected!")
                     credits = resp.json()
@@ -155,6 +338,12 @@ That's all for today. Stay tuned for more updates. Thank you for watching!"""
     with col2b:
         add_outro = st.checkbox("Add standard outro", value=True)
     
+    segmented = st.checkbox(
+        "⚡ Render long scripts in parallel segments",
+        value=False,
+        help="Splits the script at sentence/paragraph breaks, renders the parts at the same time and joins them locally (requires ffmpeg)"
+    )
+    
     # Language-specific tips
     if selected_language == "हिंदी (Hindi)":
         st.info("💡 Tip: You can mix Hindi and English words naturally. The AI will handle code-switching automatically!")
@@ -164,109 +353,142 @@ That's all for today. Stay tuned for more updates. Thank you for watching!"""
 # Generate button
 if st.button("🎬 Generate News Video", type="primary", use_container_width=True):
     if news_script and news_script.strip():
-        with st.spinner("🎥 Generating your multilingual AI news anchor video... This may take a few moments."):
-            
-            # Prepare the final script with language-appropriate intro/outro
-            final_script = ""
-            
-            if add_intro:
-                if selected_language == "हिंदी (Hindi)":
-                    final_script = "नमस्कार दोस्तों, मैं आपकी AI समाचारवाचिका हूं। आज के समाचारों में आपका स्वागत है।\n\n"
-                else:
-                    final_script = "Hello World, I'm your AI News Anchor. Welcome to today's broadcast.\n\n"
+        # Prepare the final script with language-appropriate intro/outro
+        language_code = "hi" if selected_language == "हिंदी (Hindi)" else "en"
+        final_script = ""
+        
+        if add_intro:
+            final_script = INTRO_TEXT[language_code] + "\n\n"
+        
+        final_script += news_script
+        
+        if add_outro:
+            final_script += "\n\n" + OUTRO_TEXT[language_code]
+        
+        # With ffmpeg available only the news body is rendered; the intro/outro
+        # come from the clip library
+        use_clip_library = (add_intro or add_outro) and ClipLibrary.available()
+        script_to_render = news_script if use_clip_library else final_script
+        
+        # Handle voice styles for supported voices
+        voice_for_generation = selected_voice_id
+        style_name = style_options[selected_style]
+        # For styled voices, we'll modify the script with SSML
+        script_to_use = styled_script(script_to_render, style_name)
+        
+        avatar_url_used = avatar_config["value"]
+        
+        # For Fatha, try the D-ID test image that we know works
+        if selected_avatar_name == "Fatha (Professional)":
+            # Use D-ID's working test image
+            avatar_url_used = "https://d-id-public-bucket.s3.amazonaws.com/alice.jpg"
+            st.info("Note: Using D-ID's test avatar due to server issues. The appearance may differ from Fatha.")
+        
+        # The render runs on the shared job pool; this session just follows its progress
+        job_id = get_job_manager().submit(
+            render_news_video,
+            script_to_use,
+            avatar_url_used,
+            voice_for_generation,
+            fallback_urls=avatar_config.get("fallback"),
+            style_name=style_name,
+            language_code=language_code,
+            add_intro=add_intro,
+            add_outro=add_outro,
+            use_clip_library=use_clip_library,
+            segmented_renderer=get_segmented_renderer(video_api_key) if segmented else None,
+            budget=float(os.getenv("RENDER_BUDGET", "900")),
+            description=f"{selected_avatar_name} / {selected_language}"
+        )
+        st.session_state["render_job"] = {
+            "id": job_id,
+            "avatar": selected_avatar_name,
+            "voice_id": selected_voice_id,
+            "language": selected_language,
+            "style": selected_style,
+            "final_script": final_script,
+        }
+    else:
+        st.warning("⚠️ Please enter a news script before generating the video.")
+
+@st.fragment(run_every=2)
+def show_render_progress(job_id):
+    """Status panel that refreshes on its own; the whole page only re-runs once the render ends"""
+    job = get_job_manager().get(job_id)
+    if job is None or job["status"] not in ("queued", "running"):
+        st.rerun()
+    st.info(f"🎥 {job['message']}... ({job['elapsed']:.0f}s elapsed)")
+    st.caption("You can keep editing the script while the video renders.")
+
+
+# Progress or result of this session's latest render
+render_job = st.session_state.get("render_job")
+if render_job:
+    job = get_job_manager().get(render_job["id"])
+    
+    if job is None:
+        st.warning("⚠️ The previous render has expired. Please generate the video again.")
+        del st.session_state["render_job"]
+    
+    elif job["status"] in ("queued", "running"):
+        show_render_progress(render_job["id"])
+    
+    elif job["status"] == "failed":
+        st.error(f"❌ An error occurred: {job['error']}")
+        if "500" in job["error"] or "Internal Server Error" in job["error"]:
+            st.error("D-ID is experiencing server issues. Please try again later.")
+            st.info("You can check D-ID's status at: https://status.d-id.com/")
+        else:
+            st.write("Please check your D-ID API configuration and try again.")
+    
+    else:
+        result = job["result"]
+        video_url = result["video_url"]
+        avatar_url_used = result["avatar_url_used"]
+        final_script = render_job["final_script"]
+        
+        if result["fallback_used"]:
+            st.warning("Primary avatar failed; the video was rendered with a fallback avatar.")
+        if result["clips_failed"]:
+            st.warning("Could not attach the intro/outro clips; showing the news body only.")
+        
+        if video_url:
+            st.success(f"✅ Video generated successfully in {job['elapsed']:.0f}s!")
             
-            final_script += news_script
+            # Display the video
+            st.markdown("### 📺 Your Multilingual AI News Broadcast")
+            st.video(video_url)
             
-            if add_outro:
-                if selected_language == "हिंदी (Hindi)":
-                    final_script += "\n\nआज के समाचार समाप्त। अधिक जानकारी के लिए जुड़े रहें। देखने के लिए धन्यवाद!"
-                else:
-                    final_script += "\n\nThat's all for today's news. Thank you for watching, and stay informed!"
+            # Provide download link
+            if os.path.exists(video_url):
+                with open(video_url, "rb") as video_file:
+                    st.download_button("📥 Download Video", video_file, file_name="news_anchor.mp4", mime="video/mp4")
+            else:
+                st.markdown(f"[📥 Download Video]({video_url})")
             
-            # Generate the video with fallback support
-            try:
-                # Set the selected voice and generate video
-                video_generator.voice_id = selected_voice_id
-                
-                # Handle voice styles for supported voices
-                voice_for_generation = selected_voice_id
-                if style_options[selected_style] != "default":
-                    # For styled voices, we'll modify the script with SSML
-                    style_name = style_options[selected_style]
-                    styled_script = f'<mstts:express-as style="{style_name}">{final_script}</mstts:express-as>'
-                    script_to_use = styled_script
-                else:
-                    script_to_use = final_script
+            # Display the script that was used
+            with st.expander("📄 View Final Script"):
+                st.text(final_script)
                 
-                # Try primary URL first
-                video_url = None
-                avatar_url_used = avatar_config["value"]
-                
-                # For Fatha, try the D-ID test image that we know works
-                if selected_avatar_name == "Fatha (Professional)":
-                    # Use D-ID's working test image
-                    avatar_url_used = "https://d-id-public-bucket.s3.amazonaws.com/alice.jpg"
-                    st.info("Note: Using D-ID's test avatar due to server issues. The appearance may differ from Fatha.")
-                
-                video_url = video_generator.generate_video(
-                    script_to_use, 
-                    avatar_url_used, 
-                    voice_for_generation
-                )
-                
-                # If failed and we have fallbacks, try them
-                if not video_url and avatar_config.get("fallback"):
-                    st.warning("Primary avatar failed, trying fallback options...")
-                    for fallback_url in avatar_config["fallback"]:
-                        st.info(f"Trying fallback: {fallback_url[:50]}...")
-                        video_url = video_generator.generate_video(
-                            script_to_use, 
-                            fallback_url, 
-                            voice_for_generation
-                        )
-                        if video_url:
-                            avatar_url_used = fallback_url
-                            break
-                
-                if video_url:
-                    st.success("✅ Video generated successfully!")
-                    
-                    # Display the video
-                    st.markdown("### 📺 Your Multilingual AI News Broadcast")
-                    st.video(video_url)
-                    
-                    # Provide download link
-                    st.markdown(f"[📥 Download Video]({video_url})")
-                    
-                    # Display the script that was used
-                    with st.expander("📄 View Final Script"):
-                        st.text(final_script)
-                        
-                    # Show technical details
-                    with st.expander("🔧 Technical Details"):
-                        st.write(f"**Avatar:** {selected_avatar_name}")
-                        st.write(f"**Image URL Used:** {avatar_url_used}")
-                        st.write(f"**Voice ID:** {selected_voice_id}")
-                        st.write(f"**Language:** {selected_language}")
-                        st.write(f"**Style:** {selected_style}")
-                        st.write(f"**Script Length:** {len(final_script)} characters")
-                else:
-                    st.error("❌ Failed to generate video.")
-                    st.error("D-ID's servers appear to be having issues (500 Internal Server Error).")
-                    st.info("**Try these solutions:**")
-                    st.write("1. Wait a few minutes and try again")
-                    st.write("2. Use the 'Custom News Anchor' option instead")
-                    st.write("3. Contact D-ID support if the problem persists")
-                    st.write("4. Check D-ID's status page: https://status.d-id.com/")
-            except Exception as e:
-                st.error(f"❌ An error occurred: {str(e)}")
-                if "500" in str(e) or "Internal Server Error" in str(e):
-                    st.error("D-ID is experiencing server issues. Please try again later.")
-                    st.info("You can check D-ID's status at: https://status.d-id.com/")
-                else:
-                    st.write("Please check your D-ID API configuration and try again.")
-    else:
-        st.warning("⚠️ Please enter a news script before generating the video.")
+            # Show technical details
+            with st.expander("🔧 Technical Details"):
+                st.write(f"**Avatar:** {render_job['avatar']}")
+                st.write(f"**Image URL Used:** {avatar_url_used}")
+                st.write(f"**Voice ID:** {render_job['voice_id']}")
+                st.write(f"**Language:** {render_job['language']}")
+                st.write(f"**Style:** {render_job['style']}")
+                st.write(f"**Script Length:** {len(final_script)} characters")
+                st.write(f"**Render Time:** {job['elapsed']:.1f}s")
+                st.write("**HTTP Connections:**", video_generator.transport.stats())
+                st.write("**Avatar Health:**", get_circuit_breaker().status())
+        else:
+            st.error("❌ Failed to generate video.")
+            st.error("D-ID's servers appear to be having issues (500 Internal Server Error).")
+            st.info("**Try these solutions:**")
+            st.write("1. Wait a few minutes and try again")
+            st.write("2. Use the 'Custom News Anchor' option instead")
+            st.write("3. Contact D-ID support if the problem persists")
+            st.write("4. Check D-ID's status page: https://status.d-id.com/")
 
 # Sidebar with multilingual instructions
 with st.sidebar:
@@ -0,0 +1,50 @@
+import sys
+
+
+class Article:
+    """
+    Compact news article record.
+
+    Only the fields used for scripting are kept, in __slots__ rather than a per-instance
+    dict, and source names (repeated across most of an archive) are interned so every
+    article from the same outlet shares one string.
+    """
+
+    __slots__ = ("title", "description", "url", "source")
+
+    def __init__(self, title=None, description=None, url=None, source=None):
+        self.title = title
+        self.description = description
+        self.url = url
+        self.source = sys.intern(source) if source else None
+
+    @classmethod
+    def from_json(cls, obj):
+        """Build an Article from a newsapi.org article object (or a to_dict() result)"""
+        source = obj.get("source")
+        if isinstance(source, dict):
+            source = source.get("name")
+        return cls(obj.get("title"), obj.get("description"), obj.get("url"), source)
+
+    def to_dict(self):
+        return {
+            "title": self.title,
+            "description": self.description,
+            "url": self.url,
+            "source": self.source,
+        }
+
+    def __repr__(self):
+        return f"Article(title={self.title!r}, source={self.source!r}, url={self.url!r})"
+
+
+def article_object_hook(obj):
+    """
+    json.loads object_hook that turns article objects into Article records as they are parsed.
+
+    Other objects (the response envelope, nested source objects) are returned unchanged.
+    """
+    # description (and everything but url/title) may be missing; Article defaults it to None
+    if "url" in obj and "title" in obj:
+        return Article.from_json(obj)
+    return obj
@@ -0,0 +1,190 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+import requests
+
+from http_transport import shared_transport
+
+
+class AvatarRegistry:
+    """
+    Avatar images uploaded to D-ID once and reused by their hosted URL.
+
+    A source_url pointing at a third-party host makes D-ID fetch and process the
+    image again for every talk, and the talk fails whenever that host is slow. The
+    registry uploads each image (a local file such as Logo.png or a remote URL) to
+    D-ID's /images endpoint once and remembers the returned URL together with a
+    hash of the image bytes. Later renders use the hosted URL directly; an image is
+    only uploaded again when its bytes change.
+
+    A failed upload is remembered too: for upload_retry_interval seconds renders
+    use the original source straight away instead of downloading and uploading
+    the image again on every render.
+    """
+
+    def __init__(self, db_path=".avatar_registry.sqlite3", recheck_interval=24 * 3600,
+                 upload_retry_interval=600, transport=None):
+        """
+        Args:
+            db_path: SQLite file holding source -> (content hash, hosted URL)
+            recheck_interval: Seconds before a remote image is downloaded again to
+                              check whether it changed (local files are checked on every use)
+            upload_retry_interval: Seconds after a failed upload before the image is uploaded again
+            transport: HTTPTransport used to download remote images (defaults to the shared one)
+        """
+        self.recheck_interval = recheck_interval
+        self.upload_retry_interval = upload_retry_interval
+        self.transport = transport or shared_transport()
+
+        self._lock = threading.Lock()
+        # Serializes uploads so concurrent renders of a new avatar upload it once
+        self._upload_lock = threading.Lock()
+        # Local path -> (mtime_ns, size, content hash), so unchanged files aren't re-hashed
+        self._file_hashes = {}
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS avatars (
+                source TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                hosted_url TEXT NOT NULL,
+                checked_at REAL NOT NULL
+            )
+        """)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS failed_uploads (
+                source TEXT PRIMARY KEY,
+                content_hash TEXT,
+                failed_at REAL NOT NULL
+            )
+        """)
+        self._db.commit()
+
+    @staticmethod
+    def is_local(source):
+        return "://" not in source and os.path.isfile(source)
+
+    @staticmethod
+    def is_hosted(source):
+        """D-ID's own image URLs (returned by /images) need no upload"""
+        return source.startswith("s3://")
+
+    def _local_hash(self, path):
+        stat = os.stat(path)
+        cached = self._file_hashes.get(path)
+        if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            return cached[2], None
+        with open(path, "rb") as f:
+            data = f.read()
+        content_hash = hashlib.sha256(data).hexdigest()
+        self._file_hashes[path] = (stat.st_mtime_ns, stat.st_size, content_hash)
+        return content_hash, data
+
+    def _read(self, source):
+        if self.is_local(source):
+            with open(source, "rb") as f:
+                return f.read()
+        response = self.transport.get(source, timeout=30)
+        response.raise_for_status()
+        return response.content
+
+    def _lookup(self, source):
+        with self._lock:
+            return self._db.execute(
+                "SELECT content_hash, hosted_url, checked_at FROM avatars WHERE source = ?", (source,)
+            ).fetchone()
+
+    def _hosted_for_hash(self, content_hash):
+        """Another source with the same bytes may already have been uploaded"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT hosted_url FROM avatars WHERE content_hash = ? LIMIT 1", (content_hash,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def _store(self, source, content_hash, hosted_url):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO avatars (source, content_hash, hosted_url, checked_at) VALUES (?, ?, ?, ?)",
+                (source, content_hash, hosted_url, time.time()),
+            )
+            self._db.execute("DELETE FROM failed_uploads WHERE source = ?", (source,))
+            self._db.commit()
+
+    def _upload_failed(self, source, content_hash):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO failed_uploads (source, content_hash, failed_at) VALUES (?, ?, ?)",
+                (source, content_hash, time.time()),
+            )
+            self._db.commit()
+
+    def _recently_failed(self, source, content_hash=None):
+        """
+        Whether uploading source failed within upload_retry_interval.
+
+        For a local file content_hash is its current hash; a file that changed since
+        the failure is uploaded again straight away.
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT content_hash, failed_at FROM failed_uploads WHERE source = ?", (source,)
+            ).fetchone()
+        if row is None or time.time() - row[1] >= self.upload_retry_interval:
+            return False
+        return content_hash is None or row[0] == content_hash
+
+    def resolve(self, source, upload):
+        """
+        Return the URL to send to D-ID for an avatar image.
+
+        Args:
+            source: Local file path or image URL
+            upload: Callable (image_bytes, filename) -> hosted URL or None,
+                    normally VideoGenerator.upload_image
+
+        Returns:
+            The hosted URL, or the original source if the image could not be uploaded
+            (None for an unreadable local file, which D-ID could not fetch either)
+        """
+        if not source or self.is_hosted(source):
+            return source
+
+        row = self._lookup(source)
+        local = self.is_local(source)
+        data = None
+        try:
+            if local:
+                content_hash, data = self._local_hash(source)
+                if row and row[0] == content_hash:
+                    return row[1]
+            elif row and time.time() - row[2] < self.recheck_interval:
+                return row[1]
+            if self._recently_failed(source, content_hash if local else None):
+                return None if local else source
+
+            with self._upload_lock:
+                # Another render may have failed to upload it while this one waited
+                if self._recently_failed(source, content_hash if local else None):
+                    return None if local else source
+                if data is None:
+                    data = self._read(source)
+                content_hash = hashlib.sha256(data).hexdigest()
+                hosted_url = row[1] if row and row[0] == content_hash else self._hosted_for_hash(content_hash)
+                if hosted_url is None:
+                    print(f"Uploading avatar image to D-ID: {source}")
+                    hosted_url = upload(data, os.path.basename(source.split("?")[0]) or "avatar.png")
+                    if hosted_url is None:
+                        self._upload_failed(source, content_hash)
+                        return None if local else source
+                    print(f"Avatar hosted at: {hosted_url}")
+                self._store(source, content_hash, hosted_url)
+                return hosted_url
+        except (OSError, requests.exceptions.RequestException) as e:
+            print(f"Could not read avatar image {source}: {e}")
+            if row:
+                # Keep using the last upload while the original host is unavailable
+                return row[1]
+            return None if local else source
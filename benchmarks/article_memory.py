@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark: per-article footprint of raw newsapi.org dicts vs Article records
+
+Builds a synthetic archive shaped like /v2/everything responses, parses it both ways
+and reports the memory each representation keeps alive after parsing.
+
+Usage: python benchmarks/article_memory.py [num_articles]
+"""
+
+import gc
+import json
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from article import article_object_hook  # noqa: E402
+
+
+def make_archive(num_articles, num_sources=50, seed=7):
+    rng = random.Random(seed)
+    words = [f"word{i}" for i in range(2000)]
+
+    def sentence(n):
+        return " ".join(rng.choice(words) for _ in range(n))
+
+    sources = [{"id": f"source-{i}", "name": f"Source Outlet {i}"} for i in range(num_sources)]
+    articles = []
+    for i in range(num_articles):
+        articles.append({
+            "source": rng.choice(sources),
+            "author": f"Author {rng.randint(1, 500)}",
+            "title": sentence(10),
+            "description": sentence(30),
+            "url": f"https://news.example.com/{i}/{sentence(4).replace(' ', '-')}",
+            "urlToImage": f"https://img.example.com/{i}.jpg",
+            "publishedAt": "2024-08-30T12:00:00Z",
+            "content": sentence(35) + f"… [+{rng.randint(1000, 9000)} chars]",
+        })
+    return json.dumps({"status": "ok", "totalResults": num_articles, "articles": articles})
+
+
+def retained_bytes(raw, **loads_kwargs):
+    """Bytes still allocated after parsing raw and keeping only the article list"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    articles = json.loads(raw, **loads_kwargs)["articles"]
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    assert len(articles) > 0
+    return after - before
+
+
+def main():
+    num_articles = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    raw = make_archive(num_articles)
+
+    dict_bytes = retained_bytes(raw)
+    article_bytes = retained_bytes(raw, object_hook=article_object_hook)
+
+    print(f"Articles: {num_articles}")
+    print(f"Raw dicts:        {dict_bytes / 1024:10.1f} KiB  ({dict_bytes / num_articles:7.0f} B/article)")
+    print(f"Article records:  {article_bytes / 1024:10.1f} KiB  ({article_bytes / num_articles:7.0f} B/article)")
+    print(f"Reduction:        {100 * (1 - article_bytes / dict_bytes):9.1f} %")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark of the render pipeline against the local stub server
+
+Measures generate_video latency (p50/p95/p99), renders per minute at several
+concurrency levels, HTTP calls per video, NewsAPI get_news_string latency and the
+full news -> script -> video flow, plus peak RSS. Results are written as JSON and
+can be compared against an earlier run to spot regressions.
+
+Usage:
+    python benchmarks/render_pipeline.py --output bench_results.json
+    python benchmarks/render_pipeline.py --output new.json --compare bench_results.json
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# news_api refuses to import without a key; the stub server ignores it
+os.environ.setdefault("NEWS_API_KEY", "benchmark")
+
+from http_transport import HTTPTransport  # noqa: E402
+from news_api import NewsAPI  # noqa: E402
+from news_video import AsyncVideoGenerator, VideoGenerator  # noqa: E402
+from poll_strategy import AdaptivePollStrategy  # noqa: E402
+from stub_server import StubConfig, StubServer  # noqa: E402
+
+SCRIPT = ("Today's top story: markets rallied as technology shares climbed. "
+          "In other news, researchers announced progress on battery storage. ") * 3
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(latencies):
+    return {
+        "count": len(latencies),
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "mean": sum(latencies) / len(latencies) if latencies else None,
+    }
+
+
+def peak_rss_mb():
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    return usage / (1024 * 1024) if sys.platform == "darwin" else usage / 1024
+
+
+def poll_strategy(render_median):
+    # The adaptive schedule scaled down to the stub's render times, which don't grow with script length
+    return AdaptivePollStrategy(render_overhead=render_median, render_factor=0, min_first_delay=0.1,
+                                initial_interval=0.2, max_interval=1.0, min_deadline=60)
+
+
+@contextlib.contextmanager
+def quiet():
+    """Silence the generators' progress prints while measuring"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def bench_sequential(base_url, videos, render_median):
+    transport = HTTPTransport()
+    generator = VideoGenerator("benchmark", base_url=base_url, transport=transport,
+                               poll_strategy=poll_strategy(render_median))
+    latencies = []
+    failures = 0
+    start = time.perf_counter()
+    with quiet():
+        for i in range(videos):
+            t0 = time.perf_counter()
+            result = generator.generate_video(f"{SCRIPT} Story {i}.", source_url="https://example.com/anchor.png")
+            latencies.append(time.perf_counter() - t0)
+            failures += result is None
+    elapsed = time.perf_counter() - start
+    return {
+        "latency_s": summarize(latencies),
+        "renders_per_minute": 60 * (videos - failures) / elapsed,
+        "http_calls_per_video": transport.stats()["requests"] / videos,
+        "failures": failures,
+    }
+
+
+async def _timed_batch(generator, videos, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def run(i):
+        async with semaphore:
+            t0 = time.perf_counter()
+            result = await generator.generate_video(f"{SCRIPT} Story {i}.", source_url="https://example.com/anchor.png")
+            latencies.append(time.perf_counter() - t0)
+            return result
+
+    results = await asyncio.gather(*(run(i) for i in range(videos)))
+    return latencies, results.count(None)
+
+
+def bench_concurrent(base_url, videos, concurrency, render_median):
+    transport = HTTPTransport(pool_maxsize=max(32, concurrency))
+    generator = AsyncVideoGenerator("benchmark", max_concurrency=concurrency, base_url=base_url,
+                                    transport=transport, poll_strategy=poll_strategy(render_median))
+    start = time.perf_counter()
+    with quiet():
+        latencies, failures = asyncio.run(_timed_batch(generator, videos, concurrency))
+    elapsed = time.perf_counter() - start
+    generator.close()
+    stats = transport.stats()
+    return {
+        "concurrency": concurrency,
+        "latency_s": summarize(latencies),
+        "renders_per_minute": 60 * (videos - failures) / elapsed,
+        "http_calls_per_video": stats["requests"] / videos,
+        "connections_opened": stats["connections_opened"],
+        "failures": failures,
+    }
+
+
+def bench_news(base_url, calls):
+    news = NewsAPI("benchmark", transport=HTTPTransport(), base_url=base_url)
+    latencies = []
+    with quiet():
+        for i in range(calls):
+            t0 = time.perf_counter()
+            news.get_news_string(f"technology {i % 5}", 10)
+            latencies.append(time.perf_counter() - t0)
+    return {"latency_s": summarize(latencies)}
+
+
+def bench_app_flow(base_url, runs, render_median):
+    """News fetch -> script -> render, as the bulletin flow does it"""
+    transport = HTTPTransport()
+    news = NewsAPI("benchmark", transport=transport, base_url=base_url)
+    generator = VideoGenerator("benchmark", base_url=base_url, transport=transport,
+                               poll_strategy=poll_strategy(render_median))
+    latencies = []
+    with quiet():
+        for i in range(runs):
+            t0 = time.perf_counter()
+            script = news.get_news_string(f"world {i}", 5)
+            generator.generate_video(script, source_url="https://example.com/anchor.png")
+            latencies.append(time.perf_counter() - t0)
+    return {"latency_s": summarize(latencies), "http_calls_per_run": transport.stats()["requests"] / runs}
+
+
+def git_version():
+    try:
+        return subprocess.run(["git", "describe", "--always", "--dirty"], cwd=ROOT,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(current, baseline_path):
+    """Print relative changes for the headline numbers against an earlier results file"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+
+    def rows(results):
+        yield "sequential p95", results["sequential"]["latency_s"]["p95"]
+        yield "sequential renders/min", results["sequential"]["renders_per_minute"]
+        for entry in results["concurrent"]:
+            c = entry["concurrency"]
+            yield f"c={c} p95", entry["latency_s"]["p95"]
+            yield f"c={c} renders/min", entry["renders_per_minute"]
+            yield f"c={c} http calls/video", entry["http_calls_per_video"]
+        yield "news p95", results["news"]["latency_s"]["p95"]
+        yield "app flow p95", results["app_flow"]["latency_s"]["p95"]
+        yield "peak RSS MB", results["peak_rss_mb"]
+
+    old = dict(rows(baseline))
+    print(f"\nComparison with {baseline_path} ({baseline.get('version')}):")
+    for name, value in rows(current):
+        before = old.get(name)
+        if before:
+            print(f"  {name:28s} {before:10.3f} -> {value:10.3f}  ({100 * (value - before) / before:+6.1f} %)")
+        else:
+            print(f"  {name:28s} {'n/a':>10s} -> {value:10.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render pipeline benchmark (runs against stub_server.py)")
+    parser.add_argument("--videos", type=int, default=20, help="Videos per scenario")
+    parser.add_argument("--concurrency", default="1,4,16,32", help="Comma-separated concurrency levels")
+    parser.add_argument("--render-median", type=float, default=1.0, help="Median stub render time in seconds")
+    parser.add_argument("--news-calls", type=int, default=50)
+    parser.add_argument("--app-runs", type=int, default=5)
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", help="Earlier results JSON to compare against")
+    args = parser.parse_args()
+
+    config = StubConfig(render_latency=f"lognormal:{args.render_median},0.25",
+                        queue_latency="uniform:0.05,0.2", seed=42)
+    server = StubServer(config=config).start()
+    base_url = server.base_url
+
+    print(f"Benchmarking against stub at {base_url}")
+    results = {
+        "version": git_version(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "params": vars(args),
+    }
+
+    results["sequential"] = bench_sequential(base_url, args.videos, args.render_median)
+    print(f"sequential: {results['sequential']['renders_per_minute']:.1f} renders/min")
+
+    results["concurrent"] = []
+    for level in [int(c) for c in args.concurrency.split(",")]:
+        entry = bench_concurrent(base_url, args.videos, level, args.render_median)
+        results["concurrent"].append(entry)
+        print(f"concurrency {level:3d}: {entry['renders_per_minute']:.1f} renders/min, "
+              f"p95 {entry['latency_s']['p95']:.2f}s, {entry['http_calls_per_video']:.1f} calls/video")
+
+    results["news"] = bench_news(base_url, args.news_calls)
+    print(f"get_news_string: p50 {results['news']['latency_s']['p50'] * 1000:.1f} ms")
+
+    results["app_flow"] = bench_app_flow(base_url, args.app_runs, args.render_median)
+    print(f"app flow: p50 {results['app_flow']['latency_s']['p50']:.2f}s")
+
+    results["peak_rss_mb"] = peak_rss_mb()
+    print(f"peak RSS: {results['peak_rss_mb']:.1f} MB")
+
+    server.shutdown()
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
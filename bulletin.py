@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Scheduled news bulletins that only render what changed
+
+Each cycle fetches the top articles for a query and compares them with the stories
+already aired, kept in SQLite by URL, a hash of the text that is read out and the
+clip rendered for it. New stories, and stories whose text changed, are rendered as
+one clip each; stories still running from an earlier cycle reuse the clip rendered
+then, as long as it was rendered with the current voice, style and avatar. The
+clips are joined between the library intro and outro, so a cycle costs one talk
+per new story rather than a full bulletin.
+
+Usage:
+    python bulletin.py --query technology --stories 5            # one cycle, e.g. from cron
+    python bulletin.py --query technology --stories 5 --every 1800
+
+Assembling the bulletin needs ffmpeg on PATH.
+"""
+
+import argparse
+import contextvars
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+
+from clip_library import INTRO_TEXT, OUTRO_TEXT, ClipLibrary
+from deadline import DeadlineExceeded, within
+from news_api import NewsAPI, api_key as news_api_key
+from news_video import VideoGenerator
+from render_cache import RenderCache
+from talk_store import TalkStore
+from video_concat import concat_videos
+
+
+def story_text(article):
+    """The text the anchor reads for an article"""
+    return " ".join((article.description or article.title or "").split())
+
+
+def content_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class StoryLog:
+    """Stories already rendered, by article URL, with the hash of their text and their clip"""
+
+    def __init__(self, db_path=".bulletin_stories.sqlite3"):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS stories (
+                url TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                title TEXT,
+                clip_path TEXT NOT NULL,
+                first_seen REAL NOT NULL,
+                last_seen REAL NOT NULL
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS stories_clip ON stories (clip_path)")
+        self._db.commit()
+
+    def aired(self, clip_path):
+        """
+        Whether a story already aired with this clip.
+
+        The clip path covers the text as well as the voice, style and avatar, so a story
+        syndicated under another URL with identical text counts as the same story, and
+        one aired in another voice or avatar does not.
+        """
+        with self._lock:
+            return self._db.execute(
+                "SELECT 1 FROM stories WHERE clip_path = ? LIMIT 1", (clip_path,)
+            ).fetchone() is not None
+
+    def known(self, url):
+        with self._lock:
+            return self._db.execute("SELECT 1 FROM stories WHERE url = ?", (url,)).fetchone() is not None
+
+    def record(self, url, text_hash, title, clip_path):
+        """Remember a story and its clip (a changed story replaces the old row)"""
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO stories (url, content_hash, title, clip_path, first_seen, last_seen) "
+                "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(url) DO UPDATE SET content_hash = excluded.content_hash, "
+                "title = excluded.title, clip_path = excluded.clip_path, last_seen = excluded.last_seen",
+                (url, text_hash, title, clip_path, now, now),
+            )
+            self._db.commit()
+
+    def purge(self, older_than=7 * 24 * 3600):
+        """Forget stories not seen for older_than seconds"""
+        with self._lock:
+            self._db.execute("DELETE FROM stories WHERE last_seen < ?", (time.time() - older_than,))
+            self._db.commit()
+
+
+class BulletinPipeline:
+    """Fetch, diff, render the new stories and assemble one bulletin per cycle"""
+
+    def __init__(self, news_api, clip_library, story_log, query, num_news=5, source_url=None,
+                 voice_id=None, presenter_id=None, style="default", language="en",
+                 output_dir="bulletins", max_workers=4):
+        """
+        Args:
+            news_api: NewsAPI the articles come from
+            clip_library: ClipLibrary that renders and keeps the story, intro and outro clips
+            story_log: StoryLog of the stories already rendered
+            query: News search query
+            num_news: Stories per bulletin
+            source_url, voice_id, presenter_id, style: Avatar and voice for every clip
+            language: "en" or "hi", selects the intro/outro text
+            output_dir: Directory the assembled bulletins are written to
+            max_workers: Story clips rendered at once
+        """
+        self.news_api = news_api
+        self.clip_library = clip_library
+        self.story_log = story_log
+        self.query = query
+        self.num_news = num_news
+        self.source_url = source_url
+        self.voice_id = voice_id
+        self.presenter_id = presenter_id
+        self.style = style
+        self.language = language
+        self.output_dir = output_dir
+        self.max_workers = max_workers
+        os.makedirs(output_dir, exist_ok=True)
+
+    def _clip(self, text):
+        return self.clip_library.clip(text, self.voice_id, self.style, self.source_url, self.presenter_id)
+
+    def _clip_path(self, text):
+        return self.clip_library.clip_path(text, self.voice_id, self.style, self.source_url, self.presenter_id)
+
+    def _render_clip(self, text):
+        try:
+            return self._clip(text)
+        except DeadlineExceeded as e:
+            print(f"Story not rendered in time: {e}")
+            return None
+
+    def diff(self, articles):
+        """
+        Sort the fetched articles into stories to render and stories with a clip.
+
+        Returns:
+            List of dicts (url, title, text, hash, status, clip) in feed order, where
+            status is "new", "changed" or "continuing"; repeats of a story are dropped
+        """
+        stories = []
+        seen_hashes = set()
+        for article in articles:
+            text = story_text(article)
+            url = article.url
+            if not text or not url:
+                continue
+            text_hash = content_hash(text)
+            if text_hash in seen_hashes:
+                continue
+            seen_hashes.add(text_hash)
+
+            clip_path = self._clip_path(text)
+            if self.story_log.aired(clip_path) and os.path.exists(clip_path):
+                status, clip = "continuing", clip_path
+            else:
+                status, clip = ("changed" if self.story_log.known(url) else "new"), None
+            stories.append({"url": url, "title": article.title, "text": text, "hash": text_hash,
+                            "status": status, "clip": clip})
+        return stories
+
+    def run_once(self, budget=None):
+        """
+        Run one cycle.
+
+        Args:
+            budget: Optional total seconds for fetching and rendering (see deadline.py)
+
+        Returns:
+            dict with the bulletin path (None if nothing could be assembled) and the
+            number of new, changed, continuing and failed stories
+        """
+        if not ClipLibrary.available():
+            # Nothing could be assembled, so don't pay for the renders
+            print("Error: ffmpeg not found on PATH; it is required to assemble bulletins")
+            return {"bulletin": None, "new": 0, "changed": 0, "continuing": 0, "failed": 0}
+
+        with within(budget):
+            articles = self.news_api.get_news(self.query, self.num_news)
+            stories = self.diff(articles)
+            to_render = [story for story in stories if story["clip"] is None]
+            print(f"{len(stories)} stories: {len(to_render)} to render, "
+                  f"{len(stories) - len(to_render)} continuing from earlier bulletins")
+
+            texts = [story["text"] for story in to_render] + [INTRO_TEXT[self.language], OUTRO_TEXT[self.language]]
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="bulletin") as executor:
+                # Each render runs in a copy of this thread's context so it shares the deadline
+                futures = [executor.submit(contextvars.copy_context().run, self._render_clip, text)
+                           for text in texts]
+                clips = [future.result() for future in futures]
+        outro = clips.pop()
+        intro = clips.pop()
+
+        failed = 0
+        for story, clip in zip(to_render, clips):
+            if clip is None:
+                # Not recorded, so the next cycle tries it again
+                print(f"Could not render story: {story['title']}")
+                failed += 1
+                continue
+            story["clip"] = clip
+        for story in stories:
+            if story["clip"] is not None:
+                self.story_log.record(story["url"], story["hash"], story["title"], story["clip"])
+
+        summary = {
+            "bulletin": None,
+            "new": sum(1 for story in stories if story["status"] == "new"),
+            "changed": sum(1 for story in stories if story["status"] == "changed"),
+            "continuing": sum(1 for story in stories if story["status"] == "continuing"),
+            "failed": failed,
+        }
+        parts = [story["clip"] for story in stories if story["clip"] is not None]
+        if not parts:
+            print("No stories to air")
+            return summary
+        parts = ([intro] if intro else []) + parts + ([outro] if outro else [])
+
+        output_path = os.path.join(self.output_dir, f"bulletin-{time.strftime('%Y%m%d-%H%M%S')}.mp4")
+        summary["bulletin"] = concat_videos(parts, output_path)
+        return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scheduled AI News Anchor bulletins")
+    parser.add_argument("--query", default="technology", help="News search query")
+    parser.add_argument("--stories", type=int, default=5, help="Stories per bulletin")
+    parser.add_argument("--every", type=float, help="Seconds between cycles (default: run once)")
+    parser.add_argument("--source-url", default="https://i.ibb.co/hYcxXTW/anchor.png", help="Avatar image")
+    parser.add_argument("--presenter-id", help="D-ID presenter to use instead of --source-url")
+    parser.add_argument("--voice-id", default="en-US-JennyNeural")
+    parser.add_argument("--style", default="default", help="Voice style, e.g. newscast")
+    parser.add_argument("--language", default="en", choices=sorted(INTRO_TEXT))
+    parser.add_argument("--output-dir", default="bulletins")
+    parser.add_argument("--budget", type=float, help="Seconds a cycle may take before unfinished stories wait")
+    parser.add_argument("--base-url", help="D-ID API base URL (e.g. the local stub_server.py)")
+    parser.add_argument("--news-base-url", help="newsapi.org base URL (e.g. the local stub_server.py)")
+    args = parser.parse_args()
+
+    load_dotenv()
+    generator = VideoGenerator(os.getenv("BEARER_TOKEN"), base_url=args.base_url,
+                               render_cache=RenderCache(), talk_store=TalkStore())
+    pipeline = BulletinPipeline(
+        NewsAPI(news_api_key, base_url=args.news_base_url),
+        ClipLibrary(generator, library_dir=".bulletin_clips"),
+        StoryLog(),
+        args.query,
+        num_news=args.stories,
+        source_url=None if args.presenter_id else args.source_url,
+        voice_id=args.voice_id,
+        presenter_id=args.presenter_id,
+        style=args.style,
+        language=args.language,
+        output_dir=args.output_dir,
+    )
+
+    while True:
+        started = time.monotonic()
+        try:
+            summary = pipeline.run_once(budget=args.budget)
+            print(f"Bulletin: {summary}")
+        except DeadlineExceeded as e:
+            print(f"Cycle ran out of time: {e}")
+        pipeline.story_log.purge()
+        if args.every is None:
+            break
+        time.sleep(max(0.0, args.every - (time.monotonic() - started)))
+
+
+if __name__ == "__main__":
+    main()
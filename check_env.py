@@ -167,7 +167,7 @@ def test_api_connection(token):
             "authorization": f"Bearer {token}"
         }
         
-        response = requests.get(url, headers=headers)
+        response = requests.get(url, headers=headers, timeout=30)
         
         print(f"Response Status: {response.status_code}")
         
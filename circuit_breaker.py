@@ -0,0 +1,159 @@
+import sqlite3
+import threading
+import time
+
+
+class CircuitBreaker:
+    """
+    Remembers which avatars and D-ID endpoints keep failing.
+
+    Each key (e.g. "avatar:https://.../fatha.jpg" or "endpoint:submit") counts its
+    recent consecutive failures. Once failure_threshold is reached the circuit opens
+    and allow() rejects the key for cooldown seconds, so callers go straight to a
+    fallback instead of waiting on a render that is almost certain to fail. After the
+    cooldown a single call is let through as a probe: a success closes the circuit,
+    another failure keeps it open for a further cooldown.
+
+    With db_path the state is kept in SQLite and survives restarts.
+    """
+
+    def __init__(self, failure_threshold=3, cooldown=300, failure_window=900, db_path=None):
+        """
+        Args:
+            failure_threshold: Consecutive failures that open the circuit
+            cooldown: Seconds an open circuit rejects calls before probing again
+            failure_window: Failures further apart than this start the count afresh
+            db_path: Optional SQLite file the state is persisted to
+        """
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.failure_window = failure_window
+
+        self._lock = threading.Lock()
+        self._states = {}
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS breakers (
+                    key TEXT PRIMARY KEY,
+                    failures INTEGER NOT NULL,
+                    opened_at REAL,
+                    last_failure REAL,
+                    last_success REAL
+                )
+            """)
+            self._db.commit()
+            for key, failures, opened_at, last_failure, last_success in self._db.execute(
+                    "SELECT key, failures, opened_at, last_failure, last_success FROM breakers"):
+                self._states[key] = {
+                    "failures": failures,
+                    "opened_at": opened_at,
+                    "last_failure": last_failure,
+                    "last_success": last_success,
+                }
+
+    def _state(self, key):
+        return self._states.setdefault(
+            key, {"failures": 0, "opened_at": None, "last_failure": None, "last_success": None}
+        )
+
+    def _save(self, key):
+        if self._db is None:
+            return
+        state = self._states[key]
+        self._db.execute(
+            "INSERT OR REPLACE INTO breakers (key, failures, opened_at, last_failure, last_success) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (key, state["failures"], state["opened_at"], state["last_failure"], state["last_success"]),
+        )
+        self._db.commit()
+
+    def allow(self, *keys):
+        """
+        Check whether a call touching all of keys may go ahead.
+
+        Returns False if any key's circuit is open and cooling down. Keys whose cooldown
+        has passed are let through as a probe, and further calls are held back for
+        another cooldown while it runs.
+        """
+        now = time.time()
+        with self._lock:
+            states = [self._states.get(key) for key in keys]
+            if any(s and s["opened_at"] is not None and now - s["opened_at"] < self.cooldown for s in states):
+                return False
+            for key, state in zip(keys, states):
+                if state and state["opened_at"] is not None:
+                    print(f"Probing {key} after its cooldown")
+                    state["opened_at"] = now
+                    self._save(key)
+            return True
+
+    def record_success(self, key):
+        with self._lock:
+            state = self._state(key)
+            if state["opened_at"] is not None:
+                print(f"{key} is healthy again, closing its circuit")
+            changed = state["failures"] or state["opened_at"] is not None
+            state.update(failures=0, opened_at=None, last_success=time.time())
+            # Healthy calls are the common case; only write when the state actually changed
+            if changed:
+                self._save(key)
+
+    def record_failure(self, key):
+        now = time.time()
+        with self._lock:
+            state = self._state(key)
+            if state["last_failure"] is not None and now - state["last_failure"] > self.failure_window:
+                state["failures"] = 0
+            state["failures"] += 1
+            state["last_failure"] = now
+            if state["failures"] >= self.failure_threshold:
+                if state["opened_at"] is None:
+                    print(f"{key} failed {state['failures']} times in a row, opening its circuit")
+                state["opened_at"] = now
+            self._save(key)
+
+    def is_open(self, key):
+        """True while key's circuit is open and cooling down (does not start a probe)"""
+        with self._lock:
+            state = self._states.get(key)
+            return bool(state and state["opened_at"] is not None
+                        and time.time() - state["opened_at"] < self.cooldown)
+
+    def status(self):
+        """
+        Current health of every tracked key.
+
+        Returns:
+            dict mapping key -> {"state": "closed" | "open" | "half-open", "failures",
+            "last_failure", "last_success"}
+        """
+        now = time.time()
+        with self._lock:
+            result = {}
+            for key, state in self._states.items():
+                if state["opened_at"] is None:
+                    circuit = "closed"
+                elif now - state["opened_at"] < self.cooldown:
+                    circuit = "open"
+                else:
+                    circuit = "half-open"
+                result[key] = {
+                    "state": circuit,
+                    "failures": state["failures"],
+                    "last_failure": state["last_failure"],
+                    "last_success": state["last_success"],
+                }
+            return result
+
+    def reset(self, key=None):
+        """Forget the history of one key, or of every key"""
+        with self._lock:
+            keys = [key] if key is not None else list(self._states)
+            for k in keys:
+                self._states.pop(k, None)
+                if self._db is not None:
+                    self._db.execute("DELETE FROM breakers WHERE key = ?", (k,))
+            if self._db is not None:
+                self._db.commit()
@@ -0,0 +1,141 @@
+import contextvars
+import hashlib
+import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from video_concat import concat_videos, download_video
+
+# Standard intro/outro lines read at the start and end of every bulletin
+INTRO_TEXT = {
+    "en": "Hello World, I'm your AI News Anchor. Welcome to today's broadcast.",
+    "hi": "नमस्कार दोस्तों, मैं आपकी AI समाचारवाचिका हूं। आज के समाचारों में आपका स्वागत है।",
+}
+OUTRO_TEXT = {
+    "en": "That's all for today's news. Thank you for watching, and stay informed!",
+    "hi": "आज के समाचार समाप्त। अधिक जानकारी के लिए जुड़े रहें। देखने के लिए धन्यवाद!",
+}
+
+
+def styled_script(text, style="default"):
+    """Wrap text in the SSML express-as tag for a voice style (as app.py does)"""
+    if style and style != "default":
+        return f'<mstts:express-as style="{style}">{text}</mstts:express-as>'
+    return text
+
+
+class ClipLibrary:
+    """
+    Pre-rendered intro/outro clips, one per (text, voice, style, avatar) combination.
+
+    The intro and outro are identical for every bulletin, so they are rendered once,
+    kept on disk and joined onto each freshly rendered news body with ffmpeg. Only
+    the unique body text is ever sent to /talks.
+    """
+
+    def __init__(self, video_generator, library_dir=".clip_library"):
+        """
+        Args:
+            video_generator: VideoGenerator used to render clips the first time they are needed
+            library_dir: Directory for the stored clips and assembled videos
+        """
+        self.video_generator = video_generator
+        self.library_dir = library_dir
+        os.makedirs(os.path.join(library_dir, "assembled"), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    @staticmethod
+    def available():
+        """Assembly needs ffmpeg; without it callers should render intro/outro inline"""
+        return shutil.which("ffmpeg") is not None
+
+    def clip_path(self, text, voice_id, style="default", source_url=None, presenter_id=None):
+        """Where the clip for this text, voice, style and avatar is (or will be) stored"""
+        key = "\0".join([text, voice_id or "", style or "default", source_url or "", presenter_id or ""])
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:24]
+        return os.path.join(self.library_dir, f"{digest}.mp4")
+
+    def _key_lock(self, path):
+        with self._lock:
+            return self._key_locks.setdefault(path, threading.Lock())
+
+    def clip(self, text, voice_id, style="default", source_url=None, presenter_id=None):
+        """
+        Return the local path of a clip, rendering it if it is not in the library yet.
+
+        Returns:
+            Path of the clip, or None if rendering or downloading failed
+        """
+        path = self.clip_path(text, voice_id, style, source_url, presenter_id)
+        # Concurrent callers for the same clip wait for one render instead of each paying for it
+        with self._key_lock(path):
+            if os.path.exists(path):
+                return path
+
+            print(f"Rendering library clip: {text[:40]}...")
+            result = self.video_generator.generate_video(
+                styled_script(text, style), source_url, voice_id, presenter_id
+            )
+            if not result:
+                return None
+
+            tmp_path = f"{path}.part"
+            downloaded = download_video(result, tmp_path)
+            if downloaded is None:
+                return None
+            if downloaded == tmp_path:
+                os.replace(tmp_path, path)
+            else:
+                # Already local (render cache hit), keep a copy in the library
+                shutil.copyfile(downloaded, path)
+            return path
+
+    def assemble(self, body_video, language, voice_id, style="default", source_url=None,
+                 presenter_id=None, intro=True, outro=True):
+        """
+        Join the library intro/outro onto a rendered news body.
+
+        Args:
+            body_video: URL or local path of the rendered body
+            language: "en" or "hi", selects the intro/outro text
+            voice_id, style, source_url, presenter_id: Must match the body render
+            intro: Prepend the intro clip
+            outro: Append the outro clip
+
+        Returns:
+            Path of the assembled MP4, or None if a clip or the concat step failed
+        """
+        texts = []
+        if intro:
+            texts.append(INTRO_TEXT[language])
+        if outro:
+            texts.append(OUTRO_TEXT[language])
+        if not texts:
+            return body_video
+
+        # Render any missing clips side by side, each in a copy of this context so the
+        # caller's deadline applies to them too
+        with ThreadPoolExecutor(max_workers=len(texts)) as executor:
+            futures = [
+                executor.submit(contextvars.copy_context().run,
+                                self.clip, text, voice_id, style, source_url, presenter_id)
+                for text in texts
+            ]
+            clips = [future.result() for future in futures]
+        if not all(clips):
+            return None
+
+        name = hashlib.sha256("\0".join([body_video] + clips).encode("utf-8")).hexdigest()[:24]
+        output_path = os.path.join(self.library_dir, "assembled", f"{name}.mp4")
+        body_path = download_video(body_video, os.path.join(self.library_dir, "assembled", f"{name}-body.mp4"))
+        if body_path is None:
+            return None
+
+        parts = ([clips.pop(0)] if intro else []) + [body_path] + ([clips.pop(0)] if outro else [])
+        result = concat_videos(parts, output_path)
+        if body_path != body_video:
+            os.remove(body_path)
+        return result
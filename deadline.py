@@ -0,0 +1,119 @@
+import contextvars
+import time
+from contextlib import contextmanager
+
+# (connect, read) seconds for HTTP calls made without a tighter deadline
+DEFAULT_TIMEOUT = (5, 30)
+
+
+class DeadlineExceeded(TimeoutError):
+    """The time budget given to get_news / generate_video ran out"""
+
+
+class Deadline:
+    """
+    Point in time by which a whole chain of calls must have finished.
+
+    A deadline is opened with within(budget) and applies to everything called in
+    that context: each HTTP request gets connect/read timeouts no longer than the
+    time left, waits between status checks are cut short, and once the budget is
+    spent the next call raises DeadlineExceeded instead of going out.
+    """
+
+    def __init__(self, budget):
+        """
+        Args:
+            budget: Seconds from now
+        """
+        self.budget = budget
+        self.expires_at = time.monotonic() + budget
+
+    def remaining(self):
+        """Seconds left, never negative"""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self):
+        return time.monotonic() >= self.expires_at
+
+    def check(self, what="request"):
+        """Raise DeadlineExceeded if there is no time left for what"""
+        if self.expired():
+            raise DeadlineExceeded(f"{self.budget:g}s budget used up before {what}")
+
+    def cap(self, seconds):
+        """seconds, or the time left if that is shorter"""
+        return min(seconds, self.remaining())
+
+    def timeout(self, timeout=None):
+        """
+        requests timeout for a call made now.
+
+        Args:
+            timeout: The call's own timeout, a number or (connect, read) tuple
+                     (defaults to DEFAULT_TIMEOUT)
+
+        Returns:
+            (connect, read) tuple, each no longer than the time left
+        """
+        self.check()
+        if timeout is None:
+            timeout = DEFAULT_TIMEOUT
+        connect, read = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+        return self.cap(connect), self.cap(read)
+
+    def __repr__(self):
+        return f"Deadline({self.budget:g}s, {self.remaining():.1f}s left)"
+
+
+_current = contextvars.ContextVar("deadline", default=None)
+
+
+def current_deadline():
+    """The deadline of the current context, or None"""
+    return _current.get()
+
+
+@contextmanager
+def within(budget):
+    """
+    Run the body under a deadline budget seconds from now.
+
+    An enclosing deadline that expires sooner still applies, and budget=None
+    keeps whatever deadline is already in force. Threads and tasks started with a
+    copy of the context (contextvars.copy_context) share the deadline.
+
+    Yields:
+        The Deadline in force, or None
+    """
+    if budget is None:
+        yield current_deadline()
+        return
+    deadline = Deadline(budget)
+    outer = current_deadline()
+    if outer is not None and outer.expires_at < deadline.expires_at:
+        deadline = outer
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
+
+
+def request_timeout(timeout=None):
+    """
+    Timeout to pass to requests for a call made now: the call's own timeout (or
+    DEFAULT_TIMEOUT) capped by the current deadline.
+
+    Raises:
+        DeadlineExceeded: The current deadline has already passed
+    """
+    deadline = current_deadline()
+    if deadline is None:
+        return DEFAULT_TIMEOUT if timeout is None else timeout
+    return deadline.timeout(timeout)
+
+
+def capped(seconds):
+    """seconds, cut short to the time left under the current deadline"""
+    deadline = current_deadline()
+    return seconds if deadline is None else deadline.cap(seconds)
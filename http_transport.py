@@ -0,0 +1,117 @@
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import deadline
+
+
+class HTTPTransport:
+    """
+    Keep-alive HTTP session shared by NewsAPI and VideoGenerator.
+
+    All calls go through one requests.Session whose connection pools are sized for
+    concurrent talk polling, so repeated calls to the same host reuse open TCP/TLS
+    connections instead of paying a new handshake each time. Every call gets a
+    connect/read timeout, capped by the deadline of the calling context (see
+    deadline.py), so a stalled connection can't hold a caller forever.
+    """
+
+    def __init__(self, pool_connections=10, pool_maxsize=32):
+        """
+        Args:
+            pool_connections: Number of hosts to keep connection pools for
+            pool_maxsize: Maximum open connections kept per host
+        """
+        self.session = requests.Session()
+        self._adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self.session.mount("https://", self._adapter)
+        self.session.mount("http://", self._adapter)
+
+        self._lock = threading.Lock()
+        self._requests = 0
+
+    def request(self, method, url, **kwargs):
+        kwargs["timeout"] = deadline.request_timeout(kwargs.get("timeout"))
+        with self._lock:
+            self._requests += 1
+        try:
+            return self.session.request(method, url, **kwargs)
+        except requests.exceptions.Timeout as e:
+            current = deadline.current_deadline()
+            if current is not None and current.expired():
+                raise deadline.DeadlineExceeded(f"{current.budget:g}s budget used up during {method} {url}") from e
+            raise
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def stats(self):
+        """
+        Connection reuse statistics.
+
+        Returns:
+            Dict with the total number of requests sent, connections opened and
+            requests served on an already open connection, plus a per-host breakdown
+        """
+        pools = self._adapter.poolmanager.pools
+        hosts = {}
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            hosts[f"{pool.scheme}://{pool.host}:{pool.port}"] = {
+                "requests": pool.num_requests,
+                "connections_opened": pool.num_connections,
+            }
+
+        opened = sum(host["connections_opened"] for host in hosts.values())
+        with self._lock:
+            total = self._requests
+        return {
+            "requests": total,
+            "connections_opened": opened,
+            "connections_reused": max(0, total - opened),
+            "hosts": hosts,
+        }
+
+    def close(self):
+        self.session.close()
+
+
+def retry_after_seconds(response, default=1.0):
+    """
+    Parse a Retry-After header (delta-seconds or HTTP-date).
+
+    Returns:
+        Seconds to wait, or default if the header is missing or malformed
+    """
+    value = response.headers.get("Retry-After")
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return default
+
+
+_shared_transport = None
+_shared_lock = threading.Lock()
+
+
+def shared_transport():
+    """Return the process-wide HTTPTransport, creating it on first use"""
+    global _shared_transport
+    with _shared_lock:
+        if _shared_transport is None:
+            _shared_transport = HTTPTransport()
+        return _shared_transport
@@ -0,0 +1,147 @@
+import contextvars
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+
+# User-facing descriptions of the metrics spans emitted by VideoGenerator
+PHASE_LABELS = {
+    "payload_build": "Preparing script",
+    "submit": "Submitting to D-ID",
+    "poll": "Rendering on D-ID",
+    "download": "Downloading video",
+}
+
+
+# Job running in the current context; HTTP, hedge and event threads started with a
+# copy of the context (contextvars.copy_context) report to it too
+_current_job = contextvars.ContextVar("render_job", default=None)
+
+
+class _ProgressHook(metrics.MetricsHook):
+    """Forwards pipeline spans to whichever job is running in the current context"""
+
+    def span_started(self, name, labels):
+        job = _current_job.get()
+        if job is not None and name in PHASE_LABELS:
+            job.phase_started(name)
+
+
+class RenderJob:
+    def __init__(self, job_id, description):
+        self.id = job_id
+        self.description = description
+        self.status = "queued"
+        self.phase = None
+        self.message = "Waiting for a free worker"
+        self.polls = 0
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self._lock = threading.Lock()
+
+    def phase_started(self, phase):
+        with self._lock:
+            if phase == "poll":
+                self.polls += 1
+                self.message = f"{PHASE_LABELS[phase]} (status check {self.polls})"
+            else:
+                self.message = PHASE_LABELS[phase]
+            self.phase = phase
+            self.updated_at = time.time()
+
+    def report(self, message):
+        """Progress callback handed to the job function for its own messages"""
+        with self._lock:
+            self.message = message
+            self.updated_at = time.time()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "id": self.id,
+                "description": self.description,
+                "status": self.status,
+                "phase": self.phase,
+                "message": self.message,
+                "result": self.result,
+                "error": self.error,
+                "elapsed": (self.updated_at if self.status in ("done", "failed") else time.time()) - self.created_at,
+            }
+
+
+class JobManager:
+    """
+    Process-wide pool that runs render jobs in the background.
+
+    Streamlit sessions submit a job and poll its snapshot on each rerun instead of
+    holding their script thread for the whole render, and the bounded worker pool
+    caps how many renders run at once across all users.
+    """
+
+    def __init__(self, max_workers=4, keep_finished=3600):
+        """
+        Args:
+            max_workers: Maximum number of renders running at once
+            keep_finished: Seconds a finished job's result stays available
+        """
+        self.keep_finished = keep_finished
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="render-job")
+        self._jobs = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._hook = _ProgressHook()
+        metrics.add_hook(self._hook)
+
+    def submit(self, func, *args, description="", **kwargs):
+        """
+        Run func(progress, *args, **kwargs) on the worker pool.
+
+        progress is a callable taking a status message. Spans from VideoGenerator
+        calls made inside func are reported automatically.
+
+        Returns:
+            The job ID
+        """
+        self._prune()
+        with self._lock:
+            job = RenderJob(f"job-{next(self._ids)}", description)
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job, func, args, kwargs)
+        return job.id
+
+    def _run(self, job, func, args, kwargs):
+        with job._lock:
+            job.status = "running"
+            job.message = "Starting"
+        token = _current_job.set(job)
+        try:
+            result = func(job.report, *args, **kwargs)
+            with job._lock:
+                job.result = result
+                job.status = "done"
+                job.message = "Finished"
+        except Exception as e:
+            with job._lock:
+                job.error = str(e)
+                job.status = "failed"
+                job.message = "Failed"
+        finally:
+            _current_job.reset(token)
+            job.updated_at = time.time()
+
+    def get(self, job_id):
+        """Return a snapshot dict of the job, or None if it is unknown or expired"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        return job.snapshot() if job else None
+
+    def _prune(self):
+        cutoff = time.time() - self.keep_finished
+        with self._lock:
+            for job_id in [j.id for j in self._jobs.values()
+                           if j.status in ("done", "failed") and j.updated_at < cutoff]:
+                del self._jobs[job_id]
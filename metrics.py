@@ -0,0 +1,171 @@
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Histogram buckets in seconds, from a fast HTTP call up to a long render
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300, 600)
+
+
+class MetricsHook:
+    """
+    Base class for tracer integrations.
+
+    Register a subclass with add_hook() to receive every timed span, e.g. to forward
+    them to OpenTelemetry or a log pipeline. Both methods are no-ops by default.
+    """
+
+    def span_started(self, name, labels):
+        pass
+
+    def span_finished(self, name, duration, labels, error):
+        """error is the exception that ended the span, or None"""
+        pass
+
+
+class MetricsRegistry:
+    """Thread-safe counters and histograms exported in Prometheus text format"""
+
+    def __init__(self, prefix="ai_anchor", buckets=DEFAULT_BUCKETS):
+        self.prefix = prefix
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._help = {}
+        self._hooks = []
+
+    def add_hook(self, hook):
+        with self._lock:
+            self._hooks.append(hook)
+
+    def remove_hook(self, hook):
+        with self._lock:
+            self._hooks.remove(hook)
+
+    def inc(self, name, amount=1, help=None, **labels):
+        """Increment a counter"""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            if help:
+                self._help.setdefault(name, help)
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, value, help=None, **labels):
+        """Record a value in a histogram"""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            if help:
+                self._help.setdefault(name, help)
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    histogram["counts"][i] += 1
+            histogram["sum"] += value
+            histogram["count"] += 1
+
+    @contextmanager
+    def span(self, name, **labels):
+        """
+        Time a block of code as phase `name`.
+
+        The duration goes into the phase_seconds histogram, failures are counted in
+        phase_errors_total and registered hooks are notified.
+        """
+        with self._lock:
+            hooks = list(self._hooks)
+        for hook in hooks:
+            hook.span_started(name, labels)
+
+        start = time.perf_counter()
+        error = None
+        try:
+            yield
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            self.observe("phase_seconds", duration, help="Time spent in each pipeline phase", phase=name, **labels)
+            if error is not None:
+                self.inc("phase_errors_total", help="Pipeline phases that raised", phase=name, **labels)
+            for hook in hooks:
+                hook.span_finished(name, duration, labels, error)
+
+    def snapshot(self):
+        """Plain-dict copy of all counters and histograms"""
+        with self._lock:
+            return {
+                "counters": {self._series(n, l): v for (n, l), v in self._counters.items()},
+                "histograms": {self._series(n, l): {"sum": h["sum"], "count": h["count"]}
+                               for (n, l), h in self._histograms.items()},
+            }
+
+    def _series(self, name, labels, extra=()):
+        labels = tuple(labels) + tuple(extra)
+        full_name = f"{self.prefix}_{name}"
+        if not labels:
+            return full_name
+        rendered = ",".join(f'{k}="{str(v)}"' for k, v in labels)
+        return f"{full_name}{{{rendered}}}"
+
+    def render_prometheus(self):
+        """Return all metrics in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            for kind, series in (("counter", self._counters), ("histogram", self._histograms)):
+                for name in sorted({n for n, _ in series}):
+                    if name in self._help:
+                        lines.append(f"# HELP {self.prefix}_{name} {self._help[name]}")
+                    lines.append(f"# TYPE {self.prefix}_{name} {kind}")
+                    for (n, labels), value in sorted(series.items()):
+                        if n != name:
+                            continue
+                        if kind == "counter":
+                            lines.append(f"{self._series(n, labels)} {value}")
+                            continue
+                        for bound, count in zip(self.buckets, value["counts"]):
+                            lines.append(f"{self._series(n + '_bucket', labels, [('le', bound)])} {count}")
+                        lines.append(f"{self._series(n + '_bucket', labels, [('le', '+Inf')])} {value['count']}")
+                        lines.append(f"{self._series(n + '_sum', labels)} {value['sum']}")
+                        lines.append(f"{self._series(n + '_count', labels)} {value['count']}")
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide registry used by NewsAPI and VideoGenerator
+REGISTRY = MetricsRegistry()
+
+span = REGISTRY.span
+inc = REGISTRY.inc
+observe = REGISTRY.observe
+add_hook = REGISTRY.add_hook
+
+
+def start_metrics_server(port=9108, host="127.0.0.1", registry=REGISTRY):
+    """
+    Serve GET /metrics for Prometheus on a background thread.
+
+    Returns:
+        The running HTTP server (call shutdown() to stop it)
+    """
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
@@ -1,8 +1,16 @@
-import requests
 import os
+import json
+import time
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from datetime import datetime
 
+import metrics
+from article import article_object_hook
+from deadline import within
+from http_transport import shared_transport
+
 # Load environment variables
 load_dotenv()
 
@@ -12,35 +20,167 @@ api_key = os.getenv('NEWS_API_KEY')
 if not api_key:
     raise ValueError("API key not found. Please set your API key in the environment variables.")
 
+# newsapi.org caps pageSize at 100
+MAX_PAGE_SIZE = 100
+
+
 class NewsAPI:
-    def __init__(self, api_key):
+    base_url = "https://newsapi.org"
+
+    def __init__(self, api_key, transport=None, cache=None, base_url=None):
         self.api_key = api_key
+        # base_url points the client at another server, e.g. the local stub_server.py
+        if base_url:
+            self.base_url = base_url.rstrip("/")
+        # Pooled keep-alive session shared with VideoGenerator (see http_transport.py)
+        self.transport = transport or shared_transport()
+        # The key is sent as a header built once, rather than in every query string
+        self.headers = {"X-Api-Key": api_key}
+        # Optional NewsCache; repeated queries are then served without hitting newsapi.org
+        self.cache = cache
 
-    def get_news(self, query, num_news):
+    def _everything_url(self, query, page_size, page=1):
         # Use current date or a recent date within your API plan's range
         # query = "technology"
         # num_news = 3
         current_date = "2024-08-30" 
-        url = f'https://newsapi.org/v2/everything?q={query}&from={current_date}&sortBy=popularity&pageSize={num_news}&language=en&apiKey={self.api_key}'
+        url = f'{self.base_url}/v2/everything?q={query}&from={current_date}&sortBy=popularity&pageSize={page_size}&language=en'
+        if page > 1:
+            url += f'&page={page}'
+        return url
+
+    def _fetch_page(self, query, page_size, page):
+        """
+        Fetch one page of compact articles.
+
+        Returns:
+            (articles, total_results), or (None, 0) if the request failed
+        """
+        with metrics.span("news_fetch"):
+            response = self.transport.get(self._everything_url(query, page_size, page), headers=self.headers)
+        if response.status_code != 200:
+            # Print error details for debugging
+            print(f"Error: {response.status_code}")
+            print(f"Response: {response.text}")
+            return None, 0
+
+        news_data = json.loads(response.text, object_hook=article_object_hook)
+        return news_data.get("articles", []), news_data.get("totalResults", 0)
+
+    def iter_articles(self, query, limit, page_size=MAX_PAGE_SIZE):
+        """
+        Lazily yield up to limit articles for query, walking result pages.
+
+        The next page is fetched in the background while the caller consumes the
+        current one. Articles are yielded as compact Article records. Prefetches run
+        under the caller's deadline, if one is in force (see deadline.py).
 
-        response = requests.get(url)
+        Args:
+            query: Search query
+            limit: Maximum number of articles to yield
+            page_size: Articles requested per page (at most 100)
+        """
+        page_size = max(1, min(page_size, MAX_PAGE_SIZE, limit))
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="newsapi-prefetch")
+        page = 1
+        pending = executor.submit(contextvars.copy_context().run, self._fetch_page, query, page_size, page)
+        yielded = 0
+        try:
+
+            while pending is not None:
+                articles, total_results = pending.result()
+                if not articles:
+                    return
+
+                # Start on the next page before handing out this one
+                more = (len(articles) == page_size
+                        and page * page_size < total_results
+                        and yielded + len(articles) < limit)
+                page += 1
+                pending = (executor.submit(contextvars.copy_context().run, self._fetch_page, query, page_size, page)
+                           if more else None)
+
+                for article in articles:
+                    yield article
+                    yielded += 1
+                    if yielded >= limit:
+                        return
+        finally:
+            # Drop a prefetch the caller will never consume
+            if pending is not None:
+                pending.cancel()
+            executor.shutdown(wait=False)
+
+    def _fetch_news(self, query, num_news, previous=None):
+        """
+        Fetch one page of articles from newsapi.org.
+
+        Args:
+            previous: Earlier cache entry; its ETag/Last-Modified are sent so an
+                      unchanged result comes back as 304 Not Modified
+
+        Returns:
+            Cache entry dict, or None if the request failed
+        """
+        url = self._everything_url(query, num_news)
+
+        headers = self.headers
+        if previous:
+            headers = dict(self.headers)
+            if previous.get("etag"):
+                headers["If-None-Match"] = previous["etag"]
+            if previous.get("last_modified"):
+                headers["If-Modified-Since"] = previous["last_modified"]
+
+        with metrics.span("news_fetch"):
+            response = self.transport.get(url, headers=headers)
         
-        if response.status_code == 200:
-            news_data = response.json()
-            return news_data.get("articles", [])
+        if response.status_code == 304 and previous:
+            return dict(previous, fetched_at=time.time())
+        elif response.status_code == 200:
+            news_data = json.loads(response.text, object_hook=article_object_hook)
+            return {
+                "articles": news_data.get("articles", []),
+                "fetched_at": time.time(),
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+            }
         else:
             # Print error details for debugging
             print(f"Error: {response.status_code}")
             print(f"Response: {response.text}")
-            return []
+            return None
+
+    def get_news(self, query, num_news, budget=None):
+        """
+        Fetch articles for query (served from the cache when one is configured).
+
+        Args:
+            budget: Optional total seconds for the call; each request's timeouts are cut
+                    to the time left and DeadlineExceeded is raised once it runs out
+        """
+        with metrics.span("get_news"), within(budget):
+            return self._get_news(query, num_news)
+
+    def _get_news(self, query, num_news):
+        if self.cache is not None:
+            key = self.cache.key_for(q=query, pageSize=num_news)
+            return self.cache.get(
+                key,
+                lambda previous: self._fetch_news(query, num_news, previous),
+                ttl=self.cache.ttl_for(query)
+            )
+
+        entry = self._fetch_news(query, num_news)
+        return entry["articles"] if entry else []
 
-    def get_news_descriptions(self, query, num_news):
-        news = self.get_news(query, num_news)
+    def get_news_descriptions(self, query, num_news, budget=None):
+        news = self.get_news(query, num_news, budget)
         # Use a default value for 'description' if not present
-        desc_list = [news_item.get('description', 'No description available') for news_item in news]
+        desc_list = [article.description or 'No description available' for article in news]
         return desc_list
 
-    def get_news_string(self, query, num_news):
-        desc_list = self.get_news_descriptions(query, num_news)
+    def get_news_string(self, query, num_news, budget=None):
+        desc_list = self.get_news_descriptions(query, num_news, budget)
         desc_string = ". ".join(desc_list)
         return desc_string
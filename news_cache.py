@@ -0,0 +1,160 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from article import Article, article_object_hook
+
+
+class NewsCache:
+    """
+    Cache for NewsAPI responses keyed on the normalized query parameters.
+
+    Entries live in an in-memory LRU and, if db_path is given, in SQLite so they
+    survive restarts. A fresh entry is returned as is; an entry past its TTL but
+    within stale_ttl is returned immediately while a background refresh runs
+    (stale-while-revalidate). Concurrent callers for the same key share a single
+    upstream fetch, and refreshes send the stored ETag/Last-Modified validators so
+    an unchanged result costs a 304 instead of a full payload.
+    """
+
+    def __init__(self, max_entries=256, ttl=300, stale_ttl=1800, ttl_by_query=None, db_path=None):
+        """
+        Args:
+            max_entries: Maximum number of queries kept in memory
+            ttl: Seconds an entry is served without revalidation
+            stale_ttl: Seconds past ttl during which a stale entry is still served
+                       while it is refreshed in the background
+            ttl_by_query: Optional dict overriding ttl for specific queries
+            db_path: Optional SQLite file for a persistent second level
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.ttl_by_query = {k.strip().lower(): v for k, v in (ttl_by_query or {}).items()}
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight = {}
+
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS news (
+                    key TEXT PRIMARY KEY,
+                    entry TEXT NOT NULL
+                )
+            """)
+            self._db.commit()
+
+    @staticmethod
+    def key_for(**params):
+        """Return the cache key for a set of query parameters"""
+        normalized = {}
+        for name, value in params.items():
+            if isinstance(value, str):
+                value = " ".join(value.lower().split())
+            normalized[name] = value
+        return json.dumps(normalized, sort_keys=True)
+
+    def ttl_for(self, query):
+        return self.ttl_by_query.get(" ".join(query.lower().split()), self.ttl)
+
+    def get(self, key, fetch, ttl=None):
+        """
+        Return the articles for key, fetching them if needed.
+
+        Args:
+            key: Cache key from key_for
+            fetch: Callable taking the previous entry (or None) and returning a new entry
+                   dict ({"articles", "fetched_at", "etag", "last_modified"}) or None on failure
+            ttl: Optional TTL for this key (defaults to the cache TTL)
+
+        Returns:
+            List of articles (empty if nothing could be fetched)
+        """
+        ttl = self.ttl if ttl is None else ttl
+        entry = self._lookup(key)
+
+        if entry is not None:
+            age = time.time() - entry["fetched_at"]
+            if age <= ttl:
+                return list(entry["articles"])
+            if age <= ttl + self.stale_ttl:
+                self._refresh_in_background(key, fetch, entry)
+                return list(entry["articles"])
+
+        entry = self._fetch_coalesced(key, fetch, entry)
+        return list(entry["articles"]) if entry else []
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+            if self._db is not None:
+                self._db.execute("DELETE FROM news WHERE key = ?", (key,))
+                self._db.commit()
+
+    def _lookup(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+            if self._db is None:
+                return None
+            row = self._db.execute("SELECT entry FROM news WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            entry = json.loads(row[0], object_hook=article_object_hook)
+            self._remember(key, entry)
+            return entry
+
+    def _store(self, key, entry):
+        with self._lock:
+            self._remember(key, entry)
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO news (key, entry) VALUES (?, ?)",
+                                 (key, json.dumps(entry, default=Article.to_dict)))
+                self._db.commit()
+
+    def _remember(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _fetch_coalesced(self, key, fetch, previous):
+        """Run fetch for key, or wait for the fetch another caller already started"""
+        with self._lock:
+            pending = self._inflight.get(key)
+            if pending is None:
+                pending = {"event": threading.Event(), "entry": None}
+                self._inflight[key] = pending
+                leader = True
+            else:
+                leader = False
+
+        if not leader:
+            pending["event"].wait()
+            return pending["entry"] or previous
+
+        try:
+            entry = fetch(previous)
+            if entry is not None:
+                self._store(key, entry)
+            pending["entry"] = entry
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            pending["event"].set()
+
+        # Serve the stale copy rather than nothing when the refresh failed
+        return entry or previous
+
+    def _refresh_in_background(self, key, fetch, previous):
+        with self._lock:
+            if key in self._inflight:
+                return
+        threading.Thread(target=self._fetch_coalesced, args=(key, fetch, previous), daemon=True).start()
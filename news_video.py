@@ -1,11 +1,88 @@
 import requests
 import json
+import mimetypes
 import time
+import asyncio
+import contextvars
+import queue
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from datetime import datetime
+
+import metrics
+from deadline import DeadlineExceeded, capped, current_deadline, within
+from http_transport import retry_after_seconds, shared_transport
+from poll_strategy import AdaptivePollStrategy
+from presenter_catalog import PresenterCatalog
+from render_cache import RenderCache
+from retry_policy import RetryPolicy
+from talk_events import Done, Failed, Retry, StatusChanged, Submitted, emit, listening
+
+# Flight result of a leader that was cancelled or ran out of time (see _join_flight)
+_ABANDONED = object()
 
 class VideoGenerator:
-    def __init__(self, api_key):
+    api_base = "https://api.d-id.com"
+
+    # generate_video_hedged starts the next fallback alongside an avatar once it has gone
+    # hedge_factor times the expected render time (see poll_strategy.py), and at least
+    # min_hedge_delay seconds, without a result
+    hedge_factor = 1.5
+    min_hedge_delay = 45
+
+    # Renders in flight in this process, shared by every generator instance (see _join_flight)
+    _flights = {}
+    _flights_lock = threading.Lock()
+
+    def __init__(self, api_key, poll_strategy=None, render_cache=None, transport=None, base_url=None,
+                 circuit_breaker=None, avatar_registry=None, presenter_catalog=None, talk_store=None,
+                 retry_policy=None):
         self.api_key = api_key
         self.voice_id = "en-US-JennyNeural"  # Default voice
+
+        # base_url points the client at another server, e.g. the local stub_server.py
+        api_base = (base_url or self.api_base).rstrip("/")
+        self.talks_url = f"{api_base}/talks"
+        self.presenters_url = f"{api_base}/presenters"
+        self.credits_url = f"{api_base}/credits"
+        self.images_url = f"{api_base}/images"
+
+        # Pooled keep-alive session shared with NewsAPI (see http_transport.py)
+        self.transport = transport or shared_transport()
+
+        # Auth headers are derived once from the API key rather than on every call
+        auth_header = self._auth_header()
+        self.submit_headers = {
+            "accept": "application/json",
+            "content-type": "application/json",
+            "authorization": auth_header
+        }
+        self.polling_headers = {
+            "accept": "application/json",
+            "authorization": auth_header
+        }
+
+        # Decides when to check talk status and when to give up (see poll_strategy.py)
+        self.poll_strategy = poll_strategy or AdaptivePollStrategy()
+
+        # Decides which failed submissions and status checks are retried (see retry_policy.py)
+        self.retry_policy = retry_policy or RetryPolicy()
+
+        # Optional RenderCache; identical payloads are then served from disk
+        self.render_cache = render_cache
+
+        # Optional rate limiters (see render_scheduler.TokenBucket) for /talks submissions and status polls
+        self.submit_limiter = None
+        self.poll_limiter = None
+
+        # Optional CircuitBreaker; avatars and endpoints that keep failing are skipped for a while
+        self.circuit_breaker = circuit_breaker
+
+        # Optional AvatarRegistry; source images are uploaded to D-ID once and referenced by hosted URL
+        self.avatar_registry = avatar_registry
+
+        # Optional TalkStore; submitted talk IDs survive restarts and identical payloads reuse them
+        self.talk_store = talk_store
         
         # D-ID Presenter IDs (use these instead of URLs for D-ID avatars)
         self.presenters = {
@@ -18,21 +95,23 @@ class VideoGenerator:
             "noelle-8Iy3QSlXV7": "Noelle"
         }
 
-    def generate_video(self, input_text, source_url=None, voice_id=None, presenter_id=None):
+        # presenter_id is validated against the account's cached presenter list; the IDs
+        # above are only used until the first refresh (see presenter_catalog.py)
+        self.presenter_catalog = presenter_catalog or PresenterCatalog(self.fetch_presenters, seed=self.presenters)
+
+    def _auth_header(self):
+        """Return the authorization header value for the configured API key"""
+        if self.api_key and ':' in self.api_key:
+            return f"Basic {self.api_key}"
+        return f"Bearer {self.api_key}"
+
+    def _build_payload(self, input_text, source_url=None, voice_id=None, presenter_id=None):
         """
-        Generate a video with the AI anchor reading the provided text.
-        
-        Args:
-            input_text: The script for the AI anchor to read (can include SSML)
-            source_url: URL of custom anchor image (use this OR presenter_id, not both)
-            voice_id: Optional voice ID to override the default
-            presenter_id: D-ID presenter ID for built-in avatars
-        
+        Build the /talks request payload.
+
         Returns:
-            URL of the generated video or None if failed
+            The payload dict, or None if neither source_url nor a known presenter_id was given
         """
-        url = "https://api.d-id.com/talks"
-        
         # Use provided voice_id or default
         voice_to_use = voice_id if voice_id else self.voice_id
         
@@ -74,7 +153,8 @@ class VideoGenerator:
             }
 
         # Build payload based on whether using presenter or custom image
-        if presenter_id and presenter_id in self.presenters:
+        presenter = self.presenter_catalog.get(presenter_id) if presenter_id else None
+        if presenter:
             # Using D-ID presenter
             payload = {
                 "script": script_payload,
@@ -84,7 +164,7 @@ class VideoGenerator:
                     "pad_audio": "0.0"
                 }
             }
-            print(f"Using D-ID Presenter: {self.presenters[presenter_id]} (ID: {presenter_id})")
+            print(f"Using D-ID Presenter: {presenter.get('name', 'N/A')} (ID: {presenter_id})")
         elif source_url:
             # Using custom image URL
             payload = {
@@ -97,130 +177,921 @@ class VideoGenerator:
             }
             print(f"Using custom image: {source_url}")
         else:
+            if presenter_id:
+                print(f"Error: Presenter {presenter_id} is not available to your account")
             print("Error: Must provide either source_url or presenter_id")
             return None
 
-        # Determine auth format
-        if ':' in self.api_key:
-            auth_header = f"Basic {self.api_key}"
-            print("Using Basic authentication")
-        else:
-            auth_header = f"Bearer {self.api_key}"
-            print("Using Bearer authentication")
+        return payload
+
+    def _send(self, method, url, limiter=None, endpoint=None, **kwargs):
+        """
+        Send a request, retrying transient failures as the retry policy allows.
+
+        A limiter token is taken before every attempt, and a 429 pauses the limiter for
+        its Retry-After so every caller sharing it backs off together.
+
+        Args:
+            endpoint: "submit" or "status"; picks the retry rules and names the endpoint
+                      the circuit breaker tracks
+
+        Returns:
+            The final response (a 429 or 5xx once retries are used up)
+
+        Raises:
+            requests.exceptions.RequestException: The last attempt failed to connect or timed out
+            DeadlineExceeded: The next retry would start after the current deadline
+        """
+        policy = self.retry_policy
+        policy.budget.deposit()
+        retry = 0
+        while True:
+            if limiter is not None:
+                limiter.acquire()
+            response = error = None
+            try:
+                response = self.transport.request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                error = e
+
+            reason = policy.classify(endpoint, response, error)
+            if reason is not None and retry < policy.max_retries and not policy.budget.withdraw():
+                print(f"Retry budget used up, not retrying {reason}")
+                metrics.inc("retry_budget_exhausted_total", help="Retries skipped because the retry budget was empty")
+                reason = None
+            if reason is None or retry == policy.max_retries:
+                self._record_health(endpoint and f"endpoint:{endpoint}",
+                                    error is None and response.status_code != 429 and response.status_code < 500)
+                if error is not None:
+                    raise error
+                return response
+
+            retry += 1
+            if response is not None and (response.status_code == 429 or "Retry-After" in response.headers):
+                delay = retry_after_seconds(response)
+            else:
+                delay = policy.backoff(retry)
+            deadline = current_deadline()
+            if deadline is not None and delay >= deadline.remaining():
+                raise DeadlineExceeded(f"D-ID call needs a retry in {delay:.1f}s ({reason}), "
+                                       f"after the {deadline.budget:g}s budget")
+            print(f"D-ID {endpoint or 'request'} failed ({reason}), retry {retry} in {delay:.1f}s")
+            metrics.inc("retries_total", help="D-ID calls retried", endpoint=endpoint or "other")
+            emit(Retry(reason, delay, retry))
+            if limiter is not None and response is not None and response.status_code == 429:
+                # Hold back every caller sharing the limiter, not just this one
+                limiter.pause(delay)
+            else:
+                time.sleep(delay)
+
+    def _submit_talk(self, payload):
+        """
+        POST the payload to /talks.
+
+        Returns:
+            The talk ID, or None if the response did not contain one
+        """
+        with metrics.span("submit"):
+            response = self._send("POST", self.talks_url, self.submit_limiter, endpoint="submit",
+                                  json=payload, headers=self.submit_headers)
+        print(f"Response Status Code: {response.status_code}")
+        
+        if response.status_code not in [201, 200]:
+            print(f"Error Response: {response.text}")
+            if response.status_code == 400 or response.status_code >= 500:
+                # Rejected payload or a failed render of it; throttling and account
+                # errors are not the avatar's fault and stay with endpoint:submit
+                self._record_health(self._avatar_key(payload), False)
+            if "presenter_id" in response.text and "not found" in response.text:
+                print("\n⚠️  Presenter not found. Your account may not have access to this presenter.")
+                print("   Try using a custom image URL instead.")
             
-        headers = {
-            "accept": "application/json",
-            "content-type": "application/json",
-            "authorization": auth_header
-        }
+        response.raise_for_status()
+        _response = response.json()
+        print("Initial Response: ", _response)
 
+        if 'id' not in _response:
+            print("Error: No ID in initial response:", _response)
+            return None
+
+        return _response['id']
+
+    def _fetch_talk(self, talk_id):
+        """GET the current state of a talk"""
+        metrics.inc("status_polls_total", help="Talk status GETs sent")
+        with metrics.span("poll"):
+            response = self._send("GET", f"{self.talks_url}/{talk_id}", self.poll_limiter, endpoint="status",
+                                  headers=self.polling_headers)
+        response.raise_for_status()
+        return response.json()
+
+    def _record_talk_timings(self, video_response):
+        """
+        Split a finished talk's time into D-ID queueing, rendering and our polling slack.
+
+        Uses the created_at/started_at/modified_at timestamps D-ID returns; talks
+        without them are skipped.
+        """
         try:
-            # Initial request to generate video
-            print("Initiating video generation...")
-            print(f"API Endpoint: {url}")
-            print(f"Using voice: {voice_to_use}")
-            print(f"SSML enabled: {use_ssml}")
-            print(f"Text length: {len(input_text)} characters")
-            
-            response = requests.post(url, json=payload, headers=headers)
-            print(f"Response Status Code: {response.status_code}")
-            
-            if response.status_code not in [201, 200]:
-                print(f"Error Response: {response.text}")
-                if "presenter_id" in response.text and "not found" in response.text:
-                    print("\n⚠️  Presenter not found. Your account may not have access to this presenter.")
-                    print("   Try using a custom image URL instead.")
-                
-            response.raise_for_status()
-            _response = response.json()
-            print("Initial Response: ", _response)
+            created, started, modified = (
+                datetime.fromisoformat(video_response[field].replace("Z", "+00:00")).timestamp()
+                for field in ("created_at", "started_at", "modified_at")
+            )
+        except (KeyError, AttributeError, ValueError):
+            return
+        metrics.observe("phase_seconds", started - created, phase="did_queue")
+        metrics.observe("phase_seconds", modified - started, phase="did_render")
+        slack = time.time() - modified
+        if slack >= 0:
+            metrics.observe("phase_seconds", slack, phase="poll_slack")
+
+    def _talk_outcome(self, video_response, submitted_at=None):
+        """
+        Interpret a talk status response.
+
+        Args:
+            submitted_at: time.monotonic() of the submission, to record time-to-done
+
+        Returns:
+            (finished, result_url) - finished is False while the talk is still rendering,
+            result_url is None if the talk failed
+        """
+        if 'status' not in video_response:
+            print("Error: No status in video response:", video_response)
+            return True, None
+
+        status = video_response["status"]
+        print(f"Current status: {status}")
+
+        if status in ("done", "error", "rejected"):
+            metrics.inc("talks_total", help="Finished talks by final status", outcome=status)
+            if submitted_at is not None:
+                metrics.observe("phase_seconds", time.monotonic() - submitted_at, phase="time_to_done")
+            self._record_talk_timings(video_response)
+
+        if status == "done":
+            print("Video generation completed!")
+            return True, video_response.get("result_url")
+        elif status == "error" or status == "rejected":
+            print(f"Video generation failed with status: {status}")
+            if 'error' in video_response:
+                print(f"Error details: {video_response['error']}")
+            return True, None
+
+        return False, None
+
+    @staticmethod
+    def _avatar_key(payload):
+        return f"avatar:{payload.get('presenter_id') or payload.get('source_url')}"
+
+    def _circuit_allows(self, payload):
+        """Check the circuit breaker for the payload's avatar and the /talks endpoints"""
+        if self.circuit_breaker is None:
+            return True
+        if self.circuit_breaker.allow("endpoint:submit", "endpoint:status", self._avatar_key(payload)):
+            return True
+        print("Skipping render: the avatar or the D-ID API has been failing recently (circuit open)")
+        metrics.inc("circuit_rejections_total", help="Renders skipped because a circuit was open")
+        return False
+
+    def _record_health(self, key, ok):
+        """Report a success or failure for a circuit breaker key (no-op without a breaker)"""
+        if self.circuit_breaker is None or not key:
+            return
+        if ok:
+            self.circuit_breaker.record_success(key)
+        else:
+            self.circuit_breaker.record_failure(key)
+
+    @staticmethod
+    def _emit_status(talk_id, video_response, last_status, attempt):
+        """Emit StatusChanged when a poll shows a new status; returns the current status"""
+        status = video_response.get("status")
+        if status != last_status:
+            emit(StatusChanged(talk_id, status, attempt))
+        return status
+
+    @staticmethod
+    def _emit_finished(talk_id, video_response, result, submitted_at=None):
+        """Emit Done or Failed for a talk that reached a final status"""
+        if result:
+            elapsed = time.monotonic() - submitted_at if submitted_at is not None else None
+            emit(Done(talk_id, result, video_response.get("duration"), elapsed))
+        else:
+            emit(Failed(talk_id, str(video_response.get("error") or video_response.get("status"))))
+
+    def _cached_video(self, payload):
+        """Return (cache_key, cached_path) for a payload; both are None without a render cache"""
+        if self.render_cache is None:
+            return None, None
+        cache_key = self.render_cache.key_for(payload)
+        cached_path = self.render_cache.get(cache_key)
+        if cached_path:
+            print(f"Render cache hit: {cached_path}")
+        return cache_key, cached_path
+
+    def _store_result(self, cache_key, result_url):
+        """Download a finished video into the render cache, falling back to the remote URL"""
+        if cache_key is None or not result_url:
+            return result_url
+        with metrics.span("download"):
+            return self.render_cache.put(cache_key, result_url) or result_url
+
+    def _previous_talk(self, payload):
+        """
+        Look up an earlier talk for an identical payload in the talk store.
+
+        Returns:
+            (payload_key, row) - row is None if there is nothing to reuse; both are None without a store
+        """
+        if self.talk_store is None:
+            return None, None
+        payload_key = RenderCache.key_for(payload)
+        return payload_key, self.talk_store.find(payload_key)
+
+    def _record_submission(self, payload_key, talk_id, input_text):
+        if self.talk_store is not None:
+            self.talk_store.record_submitted(payload_key, talk_id, input_text)
+
+    def _record_final(self, talk_id, status, result_url=None):
+        if self.talk_store is not None:
+            self.talk_store.update(talk_id, status, result_url)
+
+    def _forget_missing_talk(self, talk_id, error):
+        """A talk D-ID answers 404 for has expired or been deleted; stop resuming it"""
+        if talk_id is not None and getattr(error, "response", None) is not None and error.response.status_code == 404:
+            self._record_final(talk_id, "error")
+
+    def upload_image(self, image_bytes, filename="avatar.png"):
+        """
+        Upload an avatar image to D-ID's /images endpoint.
 
-            if 'id' not in _response:
-                print("Error: No ID in initial response:", _response)
+        Returns:
+            The hosted image URL to use as source_url, or None if the upload failed
+        """
+        content_type = mimetypes.guess_type(filename)[0] or "image/png"
+        try:
+            response = self.transport.post(self.images_url, headers=self.polling_headers,
+                                           files={"image": (filename, image_bytes, content_type)})
+            if response.status_code not in [201, 200]:
+                print(f"Image upload failed: {response.status_code} {response.text}")
                 return None
+            return response.json().get("url")
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print(f"Image upload error: {e}")
+            return None
 
-            talk_id = _response['id']
-            talk_url = f"{url}/{talk_id}"
-            
-            headers_polling = {
-                "accept": "application/json",
-                "authorization": auth_header
-            }
+    def _resolve_source(self, source_url):
+        """Swap an external avatar URL or local file for its D-ID hosted copy (if a registry is set)"""
+        if self.avatar_registry is None or not source_url:
+            return source_url
+        return self.avatar_registry.resolve(source_url, self.upload_image)
 
-            # Poll for video completion
-            max_attempts = 30
-            attempt = 0
-            
-            while attempt < max_attempts:
-                print(f"Checking video status... (Attempt {attempt + 1}/{max_attempts})")
-                
-                response = requests.get(talk_url, headers=headers_polling)
-                response.raise_for_status()
-                video_response = response.json()
+    def get_credits(self):
+        """Return the raw /credits response (used to check the API connection)"""
+        return self.transport.get(self.credits_url, headers=self.polling_headers)
 
-                if 'status' not in video_response:
-                    print("Error: No status in video response:", video_response)
-                    return None
+    def _log_submission(self, payload, input_text):
+        print(f"Using {self.polling_headers['authorization'].split(' ')[0]} authentication")
+        print("Initiating video generation...")
+        print(f"API Endpoint: {self.talks_url}")
+        print(f"Using voice: {payload['script']['provider']['voice_id']}")
+        print(f"SSML enabled: {payload['script']['ssml'] == 'true'}")
+        print(f"Text length: {len(input_text)} characters")
+
+    def _join_flight(self, payload):
+        """
+        Single-flight: concurrent identical renders share one talk.
+
+        The first caller for a payload becomes the leader and renders it; later callers
+        get the leader's Future and wait for its result instead of submitting the same
+        talk and polling it separately. Keyed on the account and normalized payload.
+        Followers share the leader's outcome. A leader that is cancelled or runs out of
+        time lands the flight as _ABANDONED instead; its followers then join again, so
+        one of them takes over and resumes the talk from the talk store.
+
+        Returns:
+            (key, future, is_leader)
+        """
+        key = (self.talks_url, self.polling_headers["authorization"], RenderCache.key_for(payload))
+        with self._flights_lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                metrics.inc("coalesced_renders_total", help="Renders that joined an identical render in flight")
+                print("An identical render is already in flight, waiting for its result")
+                return key, flight, False
+            flight = self._flights[key] = Future()
+            return key, flight, True
 
-                status = video_response["status"]
-                print(f"Current status: {status}")
+    def _land_flight(self, key, flight, result):
+        """Hand the leader's result to everyone waiting on the flight"""
+        with self._flights_lock:
+            self._flights.pop(key, None)
+        flight.set_result(result)
+
+    @staticmethod
+    def _wait_for_flight(flight, cancel_event=None):
+        deadline = current_deadline()
+        if cancel_event is None and deadline is None:
+            return flight.result()
+        while cancel_event is None or not cancel_event.is_set():
+            if deadline is not None:
+                deadline.check("an identical render finished")
+            done, _ = wait([flight], timeout=capped(0.5))
+            if done:
+                return flight.result()
+        return None
+
+    def generate_video(self, input_text, source_url=None, voice_id=None, presenter_id=None, cancel_event=None,
+                       budget=None):
+        """
+        Generate a video with the AI anchor reading the provided text.
+        
+        Args:
+            input_text: The script for the AI anchor to read (can include SSML)
+            source_url: URL of custom anchor image (use this OR presenter_id, not both)
+            voice_id: Optional voice ID to override the default
+            presenter_id: D-ID presenter ID for built-in avatars
+            cancel_event: Optional threading.Event; once set, polling stops and None is returned
+            budget: Optional total seconds for the whole render. Every HTTP call's timeouts
+                    are cut to the time left (see deadline.py)
+        
+        Returns:
+            URL of the generated video (or local file path when served from the
+            render cache) or None if failed
+
+        Raises:
+            DeadlineExceeded: budget ran out. A talk already submitted is left in the
+                              talk store, so a later identical request picks it up
+        """
+        if budget is not None:
+            with within(budget):
+                return self.generate_video(input_text, source_url, voice_id, presenter_id, cancel_event)
+
+        with metrics.span("payload_build"):
+            source_url = self._resolve_source(source_url)
+            payload = self._build_payload(input_text, source_url, voice_id, presenter_id)
+        if payload is None:
+            return None
 
-                if status == "done":
-                    print("Video generation completed!")
-                    return video_response.get("result_url")
-                elif status == "error" or status == "rejected":
-                    print(f"Video generation failed with status: {status}")
-                    if 'error' in video_response:
-                        print(f"Error details: {video_response['error']}")
+        cache_key, cached_path = self._cached_video(payload)
+        if cached_path:
+            return cached_path
+
+        while True:
+            key, flight, leader = self._join_flight(payload)
+            if leader:
+                break
+            result = self._wait_for_flight(flight, cancel_event)
+            if result is not _ABANDONED:
+                return result
+            print("The identical render was abandoned, taking it over")
+        outcome = _ABANDONED
+        try:
+            result = self._render(payload, input_text, cache_key, cancel_event)
+            if result or cancel_event is None or not cancel_event.is_set():
+                outcome = result
+            return result
+        finally:
+            self._land_flight(key, flight, outcome)
+
+    def _render(self, payload, input_text, cache_key, cancel_event=None):
+        """Submit (or resume) the talk for a payload and poll it to completion"""
+        # An identical payload may already be rendering, or have rendered before a restart
+        payload_key, previous = self._previous_talk(payload)
+        if previous and previous["status"] == "done":
+            print(f"Reusing finished talk {previous['talk_id']} for an identical request")
+            result = self._store_result(cache_key, previous["result_url"])
+            emit(Done(previous["talk_id"], result))
+            return result
+        if previous is None and not self._circuit_allows(payload):
+            emit(Failed(None, "circuit open: the avatar or the D-ID API has been failing recently"))
+            return None
+
+        talk_id = None
+        try:
+            if previous:
+                talk_id = previous["talk_id"]
+                submitted_at = None
+                print(f"Resuming talk {talk_id} already submitted for an identical request")
+                emit(Submitted(talk_id, resumed=True))
+            else:
+                # Initial request to generate video
+                self._log_submission(payload, input_text)
+                talk_id = self._submit_talk(payload)
+                if talk_id is None:
+                    emit(Failed(None, "no talk ID in the /talks response"))
                     return None
+                submitted_at = time.monotonic()
+                # Saved before polling so the talk can be picked up again if we die mid-render
+                self._record_submission(payload_key, talk_id, input_text)
+                emit(Submitted(talk_id))
+
+            # Poll for video completion
+            status = None
+            for attempt, delay in enumerate(self.poll_strategy.delays(input_text), 1):
+                if cancel_event is None:
+                    time.sleep(capped(delay))
+                elif cancel_event.wait(capped(delay)):
+                    print(f"[{talk_id}] Cancelled, no longer polling")
+                    metrics.inc("talks_total", outcome="cancelled")
+                    emit(Failed(talk_id, "cancelled"))
+                    return None
+                print(f"Checking video status... (Attempt {attempt})")
                 
-                attempt += 1
-                time.sleep(10)
+                video_response = self._fetch_talk(talk_id)
+                status = self._emit_status(talk_id, video_response, status, attempt)
+                finished, result_url = self._talk_outcome(video_response, submitted_at)
+                if finished:
+                    self._record_health(self._avatar_key(payload), bool(result_url))
+                    self._record_final(talk_id, "done" if result_url else "error", result_url)
+                    result = self._store_result(cache_key, result_url)
+                    self._emit_finished(talk_id, video_response, result, submitted_at)
+                    return result
 
             print("Video generation timed out")
+            metrics.inc("talks_total", outcome="timeout")
+            self._record_final(talk_id, "timeout")
+            emit(Failed(talk_id, "timed out"))
             return None
 
+        except DeadlineExceeded as e:
+            print(f"Deadline exceeded: {e}")
+            metrics.inc("talks_total", outcome="deadline")
+            emit(Failed(talk_id, f"deadline exceeded: {e}"))
+            raise
         except requests.exceptions.RequestException as e:
             print(f"Request error occurred: {e}")
+            self._forget_missing_talk(talk_id, e)
+            emit(Failed(talk_id, f"request error: {e}"))
             return None
         except json.JSONDecodeError as e:
             print(f"JSON decode error: {e}")
+            emit(Failed(talk_id, f"JSON decode error: {e}"))
             return None
         except Exception as e:
             print(f"Unexpected error: {e}")
+            emit(Failed(talk_id, f"unexpected error: {e}"))
             return None
 
-    def list_available_presenters(self):
-        """List all available D-ID presenters for your account"""
-        
-        url = "https://api.d-id.com/presenters"
-        
-        if ':' in self.api_key:
-            auth_header = f"Basic {self.api_key}"
-        else:
-            auth_header = f"Bearer {self.api_key}"
-            
-        headers = {
-            "accept": "application/json",
-            "authorization": auth_header
-        }
-        
+    def stream_video(self, input_text, source_url=None, voice_id=None, presenter_id=None, cancel_event=None,
+                     budget=None):
+        """
+        Generate a video, yielding TalkEvents (see talk_events.py) as it progresses.
+
+        Yields Submitted, StatusChanged and Retry events while the talk renders and ends
+        with exactly one Done or Failed, so callers can show progress, react to a
+        rejection straight away or start downstream work as soon as the video is ready.
+        Closing the generator early, or setting cancel_event, stops polling.
+
+        Args:
+            Same as generate_video
+        """
+        cancel_event = cancel_event or threading.Event()
+        events = queue.Queue()
+        end = object()
+
+        def run():
+            result = None
+            try:
+                with listening(events.put):
+                    result = self.generate_video(input_text, source_url, voice_id, presenter_id,
+                                                 cancel_event=cancel_event, budget=budget)
+            except DeadlineExceeded:
+                # Already reported to the stream as a Failed event
+                pass
+            finally:
+                events.put((end, result))
+
+        # Started in a copy of this context so a deadline the caller opened still applies
+        threading.Thread(target=contextvars.copy_context().run, args=(run,), name="talk-events", daemon=True).start()
+        finished = False
+        try:
+            while True:
+                event = events.get()
+                if isinstance(event, tuple) and event[0] is end:
+                    result = event[1]
+                    break
+                finished = finished or isinstance(event, (Done, Failed))
+                yield event
+            if not finished:
+                # Cache hits, coalesced renders and invalid requests emit nothing themselves
+                yield Done(None, result) if result else Failed(None, "video generation failed")
+            finished = True
+        finally:
+            if not finished:
+                cancel_event.set()
+
+    def resume_outstanding(self, max_workers=8):
+        """
+        Collect talks that were submitted but never finished polling, e.g. because the
+        process was restarted mid-render.
+
+        Each outstanding talk in the talk store is polled until it finishes and its video
+        goes into the render cache, so nothing has to be submitted (or paid for) again.
+
+        Returns:
+            dict of talk_id -> video URL/path, or None for talks that failed
+        """
+        if self.talk_store is None:
+            return {}
+        outstanding = self.talk_store.outstanding()
+        if not outstanding:
+            return {}
+
+        print(f"Resuming {len(outstanding)} outstanding talk(s)")
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(outstanding)),
+                                thread_name_prefix="did-resume") as executor:
+            results = list(executor.map(self._resume_talk, outstanding))
+        return {talk["talk_id"]: result for talk, result in zip(outstanding, results)}
+
+    def _resume_talk(self, talk):
+        talk_id = talk["talk_id"]
+        cache_key = talk["payload_key"] if self.render_cache is not None else None
         try:
-            response = requests.get(url, headers=headers)
+            for attempt, delay in enumerate(self.poll_strategy.delays(talk["input_text"] or ""), 1):
+                # The first check goes out straight away; the talk may have finished while we were down
+                if attempt > 1:
+                    time.sleep(delay)
+                print(f"[{talk_id}] Checking resumed talk... (Attempt {attempt})")
+                finished, result_url = self._talk_outcome(self._fetch_talk(talk_id))
+                if finished:
+                    self._record_final(talk_id, "done" if result_url else "error", result_url)
+                    return self._store_result(cache_key, result_url)
+            print(f"[{talk_id}] Resumed talk timed out")
+            self._record_final(talk_id, "timeout")
+        except requests.exceptions.RequestException as e:
+            print(f"[{talk_id}] Could not resume talk: {e}")
+            self._forget_missing_talk(talk_id, e)
+        return None
+
+    def _hedge_delay(self, input_text):
+        """
+        Seconds a healthy render of input_text may take before a fallback is started.
+
+        Returns:
+            None (start fallbacks only when an avatar fails) if the poll strategy
+            cannot estimate the render time
+        """
+        expected_duration = getattr(self.poll_strategy, "expected_duration", None)
+        if expected_duration is None:
+            return None
+        return max(self.min_hedge_delay, expected_duration(input_text) * self.hedge_factor)
+
+    def generate_video_hedged(self, input_text, source_urls, voice_id=None, hedge_delay=None, budget=None):
+        """
+        Render with the first avatar that works, trying fallbacks in parallel.
+
+        The first avatar starts straight away. Whenever the running attempts have gone
+        hedge_delay seconds without a result, or one of them fails, the next avatar is
+        started alongside them. The first successful render wins and the others stop
+        polling, so a dead primary costs about one render rather than one per avatar.
+
+        Args:
+            input_text: The script for the AI anchor to read (can include SSML)
+            source_urls: Avatar image URLs in order of preference (repeats are tried once)
+            voice_id: Optional voice ID to override the default
+            hedge_delay: Seconds before starting the next avatar (defaults to hedge_factor
+                         times the expected render time, at least min_hedge_delay)
+            budget: Optional total seconds shared by all the attempts
+
+        Returns:
+            (video_url, source_url) of the first successful render, or (None, None)
+
+        Raises:
+            DeadlineExceeded: budget ran out before any avatar succeeded
+        """
+        if budget is not None:
+            with within(budget):
+                return self.generate_video_hedged(input_text, source_urls, voice_id, hedge_delay)
+
+        hedge_delay = self._hedge_delay(input_text) if hedge_delay is None else hedge_delay
+        # An avatar listed twice would be submitted (and paid for) twice
+        remaining = list(dict.fromkeys(source_urls))
+        if not remaining:
+            return None, None
+        deadline = current_deadline()
+
+        cancel_event = threading.Event()
+        executor = ThreadPoolExecutor(max_workers=len(remaining), thread_name_prefix="did-hedge")
+        attempts = {}
+        try:
+            while remaining or attempts:
+                if remaining:
+                    source_url = remaining.pop(0)
+                    if attempts:
+                        print(f"Starting fallback avatar alongside {len(attempts)} running: {source_url[:50]}...")
+                        metrics.inc("hedged_attempts_total", help="Fallback avatars started in parallel")
+                    # Each attempt runs in a copy of this context so it shares the deadline
+                    future = executor.submit(contextvars.copy_context().run, self.generate_video,
+                                             input_text, source_url, voice_id, cancel_event=cancel_event)
+                    attempts[future] = source_url
+
+                timeout = hedge_delay if remaining else None
+                if deadline is not None:
+                    timeout = deadline.cap(timeout if timeout is not None else deadline.remaining())
+                done, _ = wait(attempts, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    source_url = attempts.pop(future)
+                    try:
+                        result = future.result()
+                    except DeadlineExceeded:
+                        result = None
+                    if result:
+                        return result, source_url
+                    print(f"Avatar failed: {source_url[:50]}...")
+                if deadline is not None:
+                    deadline.check("any avatar succeeded")
+            return None, None
+        finally:
+            # Losing attempts notice this at their next status check and return
+            cancel_event.set()
+            executor.shutdown(wait=False)
+
+    def fetch_presenters(self):
+        """
+        GET /presenters for the account.
+
+        Returns:
+            List of presenter dicts, or None if the request failed
+        """
+        try:
+            response = self.transport.get(self.presenters_url, headers=self.polling_headers)
             if response.status_code == 200:
-                presenters = response.json()
-                print("\nAvailable D-ID Presenters:")
-                print("-" * 40)
-                for p in presenters.get('presenters', []):
-                    print(f"ID: {p.get('id')}")
-                    print(f"Name: {p.get('name', 'N/A')}")
-                    print(f"Gender: {p.get('gender', 'N/A')}")
-                    print("-" * 40)
-                return presenters
-            else:
-                print(f"Failed to get presenters: {response.status_code}")
-                print(response.text)
-                return None
+                return response.json().get('presenters', [])
+            print(f"Failed to get presenters: {response.status_code}")
+            print(response.text)
+            return None
         except Exception as e:
             print(f"Error listing presenters: {e}")
-            return None
\ No newline at end of file
+            return None
+
+    def list_available_presenters(self, refresh=False):
+        """
+        List all available D-ID presenters for your account.
+
+        Served from the presenter catalogue; pass refresh=True to fetch the list first.
+        """
+        if refresh:
+            self.presenter_catalog.refresh()
+        presenters = self.presenter_catalog.all()
+        print("\nAvailable D-ID Presenters:")
+        print("-" * 40)
+        for p in presenters:
+            print(f"ID: {p.get('id')}")
+            print(f"Name: {p.get('name', 'N/A')}")
+            print(f"Gender: {p.get('gender', 'N/A')}")
+            print("-" * 40)
+        return {'presenters': presenters}
+
+
+class AsyncVideoGenerator(VideoGenerator):
+    """
+    Coroutine-based VideoGenerator for rendering many talks at once.
+
+    Payloads are built exactly as in VideoGenerator. The individual HTTP calls run on a
+    small thread pool while the waits between status checks are asyncio sleeps, so an
+    idle talk holds no thread and dozens of talks can be polled from one event loop.
+    """
+
+    def __init__(self, api_key, max_concurrency=10, **kwargs):
+        super().__init__(api_key, **kwargs)
+        self.max_concurrency = max_concurrency
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency,
+                                            thread_name_prefix="did-http")
+
+    async def _call(self, func, *args):
+        loop = asyncio.get_running_loop()
+        # Run in a copy of the current context so event listeners (see stream_video) see the call
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(self._executor, context.run, func, *args)
+
+    async def generate_video(self, input_text, source_url=None, voice_id=None, presenter_id=None, budget=None):
+        """
+        Generate a video with the AI anchor reading the provided text.
+
+        Same arguments, return value and DeadlineExceeded as VideoGenerator.generate_video,
+        but awaitable.
+        """
+        if budget is not None:
+            with within(budget):
+                return await self.generate_video(input_text, source_url, voice_id, presenter_id)
+
+        if self.avatar_registry is not None:
+            source_url = await self._call(self._resolve_source, source_url)
+        with metrics.span("payload_build"):
+            payload = self._build_payload(input_text, source_url, voice_id, presenter_id)
+        if payload is None:
+            return None
+
+        cache_key, cached_path = await self._call(self._cached_video, payload)
+        if cached_path:
+            return cached_path
+
+        while True:
+            key, flight, leader = self._join_flight(payload)
+            if leader:
+                break
+            # Shielded so a cancelled waiter doesn't cancel the flight for everyone else
+            deadline = current_deadline()
+            try:
+                result = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(flight)),
+                                                deadline.remaining() if deadline is not None else None)
+            except asyncio.TimeoutError:
+                raise DeadlineExceeded(f"{deadline.budget:g}s budget used up before an identical render finished")
+            if result is not _ABANDONED:
+                return result
+            print("The identical render was abandoned, taking it over")
+        # Stays _ABANDONED if the task is cancelled or runs out of time
+        outcome = _ABANDONED
+        try:
+            outcome = await self._render(payload, input_text, cache_key)
+            return outcome
+        finally:
+            self._land_flight(key, flight, outcome)
+
+    async def generate_video_hedged(self, input_text, source_urls, voice_id=None, hedge_delay=None, budget=None):
+        """
+        Render with the first avatar that works, trying fallbacks in parallel.
+
+        Same arguments, return value and DeadlineExceeded as
+        VideoGenerator.generate_video_hedged, but awaitable. The losing attempts are
+        cancelled once one avatar succeeds.
+        """
+        if budget is not None:
+            with within(budget):
+                return await self.generate_video_hedged(input_text, source_urls, voice_id, hedge_delay)
+
+        hedge_delay = self._hedge_delay(input_text) if hedge_delay is None else hedge_delay
+        remaining = list(dict.fromkeys(source_urls))
+        if not remaining:
+            return None, None
+        deadline = current_deadline()
+
+        attempts = {}
+        try:
+            while remaining or attempts:
+                if remaining:
+                    source_url = remaining.pop(0)
+                    if attempts:
+                        print(f"Starting fallback avatar alongside {len(attempts)} running: {source_url[:50]}...")
+                        metrics.inc("hedged_attempts_total", help="Fallback avatars started in parallel")
+                    # Tasks start with a copy of this context, so they share the deadline
+                    task = asyncio.ensure_future(self.generate_video(input_text, source_url, voice_id))
+                    attempts[task] = source_url
+
+                timeout = hedge_delay if remaining else None
+                if deadline is not None:
+                    timeout = deadline.cap(timeout if timeout is not None else deadline.remaining())
+                done, _ = await asyncio.wait(attempts, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    source_url = attempts.pop(task)
+                    try:
+                        result = task.result()
+                    except DeadlineExceeded:
+                        result = None
+                    if result:
+                        return result, source_url
+                    print(f"Avatar failed: {source_url[:50]}...")
+                if deadline is not None:
+                    deadline.check("any avatar succeeded")
+            return None, None
+        finally:
+            for task in attempts:
+                task.cancel()
+
+    async def _render(self, payload, input_text, cache_key):
+        payload_key, previous = await self._call(self._previous_talk, payload)
+        if previous and previous["status"] == "done":
+            print(f"Reusing finished talk {previous['talk_id']} for an identical request")
+            result = await self._call(self._store_result, cache_key, previous["result_url"])
+            emit(Done(previous["talk_id"], result))
+            return result
+        if previous is None and not self._circuit_allows(payload):
+            emit(Failed(None, "circuit open: the avatar or the D-ID API has been failing recently"))
+            return None
+
+        talk_id = None
+        try:
+            if previous:
+                talk_id = previous["talk_id"]
+                submitted_at = None
+                print(f"Resuming talk {talk_id} already submitted for an identical request")
+                emit(Submitted(talk_id, resumed=True))
+            else:
+                self._log_submission(payload, input_text)
+                talk_id = await self._call(self._submit_talk, payload)
+                if talk_id is None:
+                    emit(Failed(None, "no talk ID in the /talks response"))
+                    return None
+                submitted_at = time.monotonic()
+                await self._call(self._record_submission, payload_key, talk_id, input_text)
+                emit(Submitted(talk_id))
+
+            status = None
+            for attempt, delay in enumerate(self.poll_strategy.delays(input_text), 1):
+                await asyncio.sleep(capped(delay))
+                print(f"[{talk_id}] Checking video status... (Attempt {attempt})")
+
+                video_response = await self._call(self._fetch_talk, talk_id)
+                status = self._emit_status(talk_id, video_response, status, attempt)
+                finished, result_url = self._talk_outcome(video_response, submitted_at)
+                if finished:
+                    self._record_health(self._avatar_key(payload), bool(result_url))
+                    await self._call(self._record_final, talk_id, "done" if result_url else "error", result_url)
+                    result = await self._call(self._store_result, cache_key, result_url)
+                    self._emit_finished(talk_id, video_response, result, submitted_at)
+                    return result
+
+            print(f"[{talk_id}] Video generation timed out")
+            metrics.inc("talks_total", outcome="timeout")
+            await self._call(self._record_final, talk_id, "timeout")
+            emit(Failed(talk_id, "timed out"))
+            return None
+
+        except DeadlineExceeded as e:
+            print(f"Deadline exceeded: {e}")
+            metrics.inc("talks_total", outcome="deadline")
+            emit(Failed(talk_id, f"deadline exceeded: {e}"))
+            raise
+        except requests.exceptions.RequestException as e:
+            print(f"Request error occurred: {e}")
+            await self._call(self._forget_missing_talk, talk_id, e)
+            emit(Failed(talk_id, f"request error: {e}"))
+            return None
+        except json.JSONDecodeError as e:
+            print(f"JSON decode error: {e}")
+            emit(Failed(talk_id, f"JSON decode error: {e}"))
+            return None
+        except Exception as e:
+            print(f"Unexpected error: {e}")
+            emit(Failed(talk_id, f"unexpected error: {e}"))
+            return None
+
+    async def stream_video(self, input_text, source_url=None, voice_id=None, presenter_id=None, budget=None):
+        """
+        Generate a video, yielding TalkEvents as it progresses (async iterator).
+
+        Same events as VideoGenerator.stream_video. Leaving the loop early (or
+        cancelling the task iterating it) cancels the render.
+        """
+        loop = asyncio.get_running_loop()
+        events = asyncio.Queue()
+        # Events come from the event loop and from the HTTP threads alike
+        with listening(lambda event: loop.call_soon_threadsafe(events.put_nowait, event)):
+            task = asyncio.ensure_future(self.generate_video(input_text, source_url, voice_id, presenter_id, budget))
+
+        finished = False
+        try:
+            while True:
+                getter = asyncio.ensure_future(events.get())
+                done, _ = await asyncio.wait({getter, task}, return_when=asyncio.FIRST_COMPLETED)
+                if getter not in done:
+                    getter.cancel()
+                    # Let events scheduled just before the task finished arrive
+                    await asyncio.sleep(0)
+                    break
+                event = getter.result()
+                finished = finished or isinstance(event, (Done, Failed))
+                yield event
+
+            while not events.empty():
+                event = events.get_nowait()
+                finished = finished or isinstance(event, (Done, Failed))
+                yield event
+            # A DeadlineExceeded from the render is reported as its Failed event, not raised
+            error = task.exception()
+            if not finished:
+                result = None if error else task.result()
+                yield Done(None, result) if result else Failed(None, str(error or "video generation failed"))
+        finally:
+            if not task.done():
+                task.cancel()
+
+    async def generate_many(self, jobs, max_concurrency=None):
+        """
+        Render several videos concurrently.
+
+        Args:
+            jobs: Iterable of dicts with generate_video keyword arguments
+                  (input_text, source_url, voice_id, presenter_id, budget)
+            max_concurrency: Maximum number of talks in flight at once
+                             (defaults to the value given to the constructor)
+
+        Returns:
+            List of result URLs (or None for failed jobs) in the same order as jobs
+        """
+        semaphore = asyncio.Semaphore(max_concurrency or self.max_concurrency)
+
+        async def run(job):
+            async with semaphore:
+                try:
+                    return await self.generate_video(**job)
+                except DeadlineExceeded:
+                    return None
+
+        return await asyncio.gather(*(run(job) for job in jobs))
+
+    def close(self):
+        """Shut down the HTTP thread pool"""
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,88 @@
+import random
+import re
+import time
+
+
+class FixedPollStrategy:
+    """Poll at a fixed interval for a fixed number of attempts (the original behaviour)"""
+
+    def __init__(self, interval=10, max_attempts=30):
+        self.interval = interval
+        self.max_attempts = max_attempts
+
+    def delays(self, input_text):
+        """Yield the number of seconds to wait before each status check"""
+        for attempt in range(self.max_attempts):
+            yield 0 if attempt == 0 else self.interval
+
+
+class AdaptivePollStrategy:
+    """
+    Poll schedule derived from the length of the script.
+
+    The first status check is delayed until the render is expected to be nearly done,
+    after which checks back off exponentially (with jitter) up to max_interval. Polling
+    stops once a deadline proportional to the expected render time has passed, so long
+    scripts get a longer window and short clips are picked up soon after they finish.
+    """
+
+    def __init__(self, chars_per_second=15.0, render_overhead=5.0, render_factor=1.0,
+                 first_poll_fraction=0.8, min_first_delay=2.0, initial_interval=2.0,
+                 backoff=1.5, max_interval=15.0, jitter=0.5, deadline_factor=4.0,
+                 min_deadline=300.0):
+        """
+        Args:
+            chars_per_second: Approximate speaking rate used to estimate clip length
+            render_overhead: Fixed seconds D-ID spends on every talk (queueing, setup)
+            render_factor: Render seconds per second of speech
+            first_poll_fraction: Fraction of the expected render time to wait before the first check
+            min_first_delay: Lower bound for the first wait
+            initial_interval: Wait between the first and second checks
+            backoff: Multiplier applied to the interval after every check
+            max_interval: Upper bound for the interval between checks
+            jitter: Fraction of each interval that is randomised (0 disables jitter)
+            deadline_factor: Total polling window as a multiple of the expected render time
+            min_deadline: Lower bound for the total polling window (the original fixed
+                          strategy gave up after 300s, so slow queueing is not a timeout)
+        """
+        self.chars_per_second = chars_per_second
+        self.render_overhead = render_overhead
+        self.render_factor = render_factor
+        self.first_poll_fraction = first_poll_fraction
+        self.min_first_delay = min_first_delay
+        self.initial_interval = initial_interval
+        self.backoff = backoff
+        self.max_interval = max_interval
+        self.jitter = jitter
+        self.deadline_factor = deadline_factor
+        self.min_deadline = min_deadline
+
+    def expected_duration(self, input_text):
+        """Estimate how many seconds D-ID will take to render the script"""
+        # SSML tags are not spoken, so leave them out of the estimate
+        spoken_text = re.sub(r'<[^>]+>', '', input_text)
+        speech_seconds = len(spoken_text.strip()) / self.chars_per_second
+        return self.render_overhead + speech_seconds * self.render_factor
+
+    def deadline(self, input_text):
+        """Total number of seconds to keep polling for the script"""
+        return max(self.min_deadline, self.expected_duration(input_text) * self.deadline_factor)
+
+    def _jittered(self, interval):
+        return interval * (1 - self.jitter * random.random())
+
+    def delays(self, input_text):
+        """Yield the number of seconds to wait before each status check"""
+        deadline = self.deadline(input_text)
+        start = time.monotonic()
+
+        delay = max(self.min_first_delay, self.expected_duration(input_text) * self.first_poll_fraction)
+        interval = self.initial_interval
+
+        while True:
+            remaining = deadline - (time.monotonic() - start)
+            if remaining <= 0:
+                return
+            yield min(delay, remaining)
+            delay = self._jittered(interval)
+            interval = min(self.max_interval, interval * self.backoff)
@@ -0,0 +1,103 @@
+import json
+import os
+import threading
+import time
+
+
+class PresenterCatalog:
+    """
+    Cached list of the D-ID presenters the account can use.
+
+    Lookups are plain dict reads and never wait on the network. The catalogue is
+    loaded from cache_path at startup (or seeded with known IDs), and once it is
+    older than ttl the next lookup starts a refresh on a background thread while
+    the current data keeps being served. generate_video checks presenter_id here,
+    so an ID the account has lost access to is caught before the /talks POST.
+    """
+
+    def __init__(self, fetch, cache_path=None, ttl=6 * 3600, seed=None):
+        """
+        Args:
+            fetch: Callable returning the list of presenter dicts from /presenters,
+                   or None on failure (normally VideoGenerator.fetch_presenters)
+            cache_path: Optional JSON file the catalogue is saved to and loaded from
+            ttl: Seconds before the catalogue is refreshed in the background
+            seed: Optional dict of presenter_id -> name used until the first fetch
+        """
+        self.fetch = fetch
+        self.cache_path = cache_path
+        self.ttl = ttl
+
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self._by_id = {pid: {"id": pid, "name": name} for pid, name in (seed or {}).items()}
+        self._fetched_at = 0
+        self._load()
+
+    def _load(self):
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path, encoding="utf-8") as f:
+                data = json.load(f)
+            self._by_id = {p["id"]: p for p in data["presenters"]}
+            self._fetched_at = data["fetched_at"]
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Ignoring unreadable presenter catalogue {self.cache_path}: {e}")
+
+    def _save(self, presenters, fetched_at):
+        if not self.cache_path:
+            return
+        tmp_path = f"{self.cache_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"fetched_at": fetched_at, "presenters": presenters}, f)
+        os.replace(tmp_path, self.cache_path)
+
+    def refresh(self):
+        """
+        Fetch the catalogue now (blocking).
+
+        Returns:
+            True if the catalogue was updated, False if the fetch failed
+        """
+        try:
+            presenters = self.fetch()
+        except Exception as e:
+            print(f"Presenter catalogue refresh failed: {e}")
+            presenters = None
+
+        with self._lock:
+            self._refreshing = False
+            if presenters is None:
+                # Keep serving what we have and try again in a minute rather than on every lookup
+                self._fetched_at = max(self._fetched_at, time.time() - self.ttl + 60)
+                return False
+            presenters = [p for p in presenters if p.get("id")]
+            fetched_at = time.time()
+            self._by_id = {p["id"]: p for p in presenters}
+            self._fetched_at = fetched_at
+        try:
+            self._save(presenters, fetched_at)
+        except OSError as e:
+            print(f"Could not save presenter catalogue: {e}")
+        return True
+
+    def _refresh_if_stale(self):
+        with self._lock:
+            if self._refreshing or time.time() - self._fetched_at < self.ttl:
+                return
+            self._refreshing = True
+        threading.Thread(target=self.refresh, name="presenter-refresh", daemon=True).start()
+
+    def get(self, presenter_id):
+        """Return the presenter dict for an ID, or None if the account doesn't have it"""
+        self._refresh_if_stale()
+        return self._by_id.get(presenter_id)
+
+    def __contains__(self, presenter_id):
+        return self.get(presenter_id) is not None
+
+    def all(self):
+        """All presenters in the catalogue"""
+        self._refresh_if_stale()
+        return list(self._by_id.values())
@@ -0,0 +1,144 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import requests
+
+from deadline import DeadlineExceeded
+from http_transport import shared_transport
+
+
+class RenderCache:
+    """
+    On-disk cache of rendered talk videos.
+
+    Entries are keyed on a hash of the normalized /talks payload (script, voice, style,
+    presenter_id/source_url and config), so an identical request never goes back to D-ID.
+    The index lives in SQLite next to the downloaded MP4 files; entries expire after ttl
+    seconds and the least recently used files are evicted once max_bytes is exceeded.
+    """
+
+    def __init__(self, cache_dir=".render_cache", max_bytes=2 * 1024 ** 3, ttl=7 * 24 * 3600, transport=None):
+        """
+        Args:
+            cache_dir: Directory holding the SQLite index and the MP4 files
+            max_bytes: Total size of cached videos before LRU eviction kicks in
+            ttl: Seconds a cached video stays valid
+            transport: HTTPTransport used for downloads (defaults to the shared one)
+        """
+        self.cache_dir = cache_dir
+        self.transport = transport or shared_transport()
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        os.makedirs(cache_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(cache_dir, "index.sqlite3"), check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS renders (
+                key TEXT PRIMARY KEY,
+                path TEXT NOT NULL,
+                source_url TEXT,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._db.commit()
+
+    @staticmethod
+    def key_for(payload):
+        """Return the cache key for a /talks payload"""
+        normalized = json.loads(json.dumps(payload))
+        script = normalized.get("script", {})
+        if isinstance(script.get("input"), str):
+            # Whitespace differences (e.g. the SSML wrapper's indentation) don't change the video
+            script["input"] = " ".join(script["input"].split())
+        encoded = json.dumps(normalized, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """
+        Look up a cached video.
+
+        Returns:
+            Path of the cached MP4, or None on a miss or expired entry
+        """
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT path, created_at FROM renders WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+
+            path, created_at = row
+            if now - created_at > self.ttl or not os.path.exists(path):
+                self._delete(key, path)
+                self._db.commit()
+                return None
+
+            self._db.execute("UPDATE renders SET last_access = ? WHERE key = ?", (now, key))
+            self._db.commit()
+            return path
+
+    def put(self, key, result_url):
+        """
+        Download a rendered video into the cache.
+
+        Returns:
+            Path of the cached MP4, or None if the download failed
+        """
+        path = os.path.join(self.cache_dir, f"{key}.mp4")
+        tmp_path = f"{path}.part"
+
+        try:
+            with self.transport.get(result_url, stream=True) as response:
+                response.raise_for_status()
+                with open(tmp_path, "wb") as f:
+                    for chunk in response.iter_content(chunk_size=1024 * 1024):
+                        f.write(chunk)
+            os.replace(tmp_path, path)
+        except (requests.exceptions.RequestException, DeadlineExceeded, OSError) as e:
+            print(f"Failed to cache video {result_url}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return None
+
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO renders (key, path, source_url, size, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, path, result_url, os.path.getsize(path), now, now)
+            )
+            self._evict(now)
+            self._db.commit()
+        # A single video larger than max_bytes is evicted straight away
+        return path if os.path.exists(path) else None
+
+    def total_bytes(self):
+        with self._lock:
+            return self._db.execute("SELECT COALESCE(SUM(size), 0) FROM renders").fetchone()[0]
+
+    def _delete(self, key, path):
+        self._db.execute("DELETE FROM renders WHERE key = ?", (key,))
+        if os.path.exists(path):
+            os.remove(path)
+
+    def _evict(self, now):
+        # Drop expired entries first, then least recently used until under the size limit
+        for key, path in self._db.execute(
+                "SELECT key, path FROM renders WHERE created_at < ?", (now - self.ttl,)).fetchall():
+            self._delete(key, path)
+
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM renders").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, path, size in self._db.execute(
+                "SELECT key, path, size FROM renders ORDER BY last_access ASC").fetchall():
+            self._delete(key, path)
+            total -= size
+            if total <= self.max_bytes:
+                break
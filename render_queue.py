@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+SQLite-backed render queue and worker processes
+
+Jobs are leased to workers for visibility_timeout seconds and kept leased by a
+heartbeat while their talks render. A job whose worker dies goes back to the queue
+when its lease runs out, and with the talk store the next worker resumes polling the
+talk already submitted instead of paying for it again. Any number of worker
+processes on the machine holding the queue file can serve one queue. The file must
+stay on a local disk: the queue runs in SQLite's WAL mode, whose shared-memory index
+does not work over NFS/SMB, so hosts cannot share it through a network filesystem.
+
+Usage:
+    python render_queue.py enqueue jobs.jsonl
+    python render_queue.py work --processes 4 --concurrency 16
+    python render_queue.py results --follow > results.jsonl
+
+Each manifest line is a JSON object with generate_video arguments (input_text,
+source_url, voice_id, presenter_id) and an optional "id"; results are written as
+one JSON object per finished job.
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+
+from dotenv import load_dotenv
+
+from news_video import AsyncVideoGenerator
+from render_cache import RenderCache
+from talk_store import TalkStore
+
+# Keys of a manifest line that are passed on to generate_video
+JOB_FIELDS = ("input_text", "source_url", "voice_id", "presenter_id")
+
+
+class RenderQueue:
+    """Durable job queue with leases, shared by worker processes through one SQLite file"""
+
+    def __init__(self, db_path=".render_queue.sqlite3", visibility_timeout=900, max_attempts=3):
+        """
+        Args:
+            db_path: SQLite file holding the queue
+            visibility_timeout: Seconds a leased job stays hidden from other workers
+                                without a heartbeat before it is handed out again
+            max_attempts: Leases per job before it is marked failed
+        """
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+
+        self._lock = threading.Lock()
+        # Autocommit mode so leases can take the write lock up front with BEGIN IMMEDIATE
+        self._db = sqlite3.connect(db_path, timeout=30, isolation_level=None, check_same_thread=False)
+        # WAL lets workers read while another one writes; it needs a local filesystem
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT,
+                params TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                lease_owner TEXT,
+                lease_expires REAL,
+                result TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                finished_at REAL
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, lease_expires)")
+
+    def enqueue(self, params, name=None):
+        """
+        Add a render job.
+
+        Args:
+            params: dict of generate_video keyword arguments
+            name: Optional caller-chosen job name, echoed in the results
+
+        Returns:
+            The job's queue ID
+        """
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT INTO jobs (name, params, status, created_at) VALUES (?, ?, 'queued', ?)",
+                (name, json.dumps(params), time.time()),
+            )
+            return cursor.lastrowid
+
+    def lease(self, worker_id, limit=1):
+        """
+        Take up to limit jobs that are queued or whose lease has expired.
+
+        Returns:
+            List of dicts with id, name, params and attempts
+        """
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._db.execute(
+                    "SELECT id, name, params, attempts FROM jobs "
+                    "WHERE status = 'queued' OR (status = 'leased' AND lease_expires < ?) "
+                    "ORDER BY id LIMIT ?",
+                    (now, limit),
+                ).fetchall()
+                jobs = []
+                for job_id, name, params, attempts in rows:
+                    if attempts >= self.max_attempts:
+                        # Its workers kept dying; don't hand it out forever
+                        self._db.execute(
+                            "UPDATE jobs SET status = 'failed', error = ?, finished_at = ? WHERE id = ?",
+                            ("lease expired too many times", now, job_id),
+                        )
+                        continue
+                    self._db.execute(
+                        "UPDATE jobs SET status = 'leased', attempts = attempts + 1, lease_owner = ?, "
+                        "lease_expires = ? WHERE id = ?",
+                        (worker_id, now + self.visibility_timeout, job_id),
+                    )
+                    jobs.append({"id": job_id, "name": name, "params": json.loads(params), "attempts": attempts + 1})
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return jobs
+
+    def heartbeat(self, job_ids, worker_id):
+        """Extend the leases this worker still holds"""
+        if not job_ids:
+            return
+        with self._lock:
+            self._db.executemany(
+                "UPDATE jobs SET lease_expires = ? WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+                [(time.time() + self.visibility_timeout, job_id, worker_id) for job_id in job_ids],
+            )
+
+    def finish(self, job_id, worker_id, result=None, error=None):
+        """
+        Record a job's outcome. A job without a result is retried until max_attempts.
+
+        Returns:
+            False if the lease had already passed to another worker
+        """
+        now = time.time()
+        with self._lock:
+            if result:
+                cursor = self._db.execute(
+                    "UPDATE jobs SET status = 'done', result = ?, error = NULL, finished_at = ? "
+                    "WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+                    (result, now, job_id, worker_id),
+                )
+            else:
+                cursor = self._db.execute(
+                    "UPDATE jobs SET error = ?, lease_owner = NULL, lease_expires = NULL, "
+                    "status = CASE WHEN attempts < ? THEN 'queued' ELSE 'failed' END, "
+                    "finished_at = CASE WHEN attempts < ? THEN NULL ELSE ? END "
+                    "WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+                    (error, self.max_attempts, self.max_attempts, now, job_id, worker_id),
+                )
+            return cursor.rowcount == 1
+
+    def finished(self, after_id=0, since=0.0):
+        """Done or failed jobs with an ID above after_id that finished at or after since, oldest first"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, name, status, attempts, result, error, created_at, finished_at FROM jobs "
+                "WHERE id > ? AND finished_at >= ? AND status IN ('done', 'failed') ORDER BY finished_at, id",
+                (after_id, since),
+            ).fetchall()
+        return [
+            {"id": job_id, "name": name, "status": status, "attempts": attempts, "result": result,
+             "error": error, "finished_at": finished_at, "seconds": round(finished_at - created_at, 1)}
+            for job_id, name, status, attempts, result, error, created_at, finished_at in rows
+        ]
+
+    def counts(self):
+        """Number of jobs in each status"""
+        with self._lock:
+            return dict(self._db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+
+
+async def run_worker(queue, generator, concurrency=16, idle_sleep=1.0, exit_when_empty=False, budget=None):
+    """
+    Lease jobs from queue and render them with an AsyncVideoGenerator, up to
+    concurrency talks at once, until cancelled (or, with exit_when_empty, until the
+    queue has nothing left to hand out). Each job gets budget seconds, if given.
+
+    Queue calls run on a thread, so a database held locked by another worker stalls
+    only the call waiting on it, not every talk polled from the event loop.
+    """
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    heartbeat_every = queue.visibility_timeout / 3
+    last_heartbeat = time.monotonic()
+    running = {}
+
+    async def render(job):
+        params = {k: v for k, v in job["params"].items() if k in JOB_FIELDS}
+        try:
+            result = await generator.generate_video(**params, budget=budget)
+            error = None if result else "render failed"
+        except Exception as e:
+            result, error = None, str(e)
+        try:
+            recorded = await asyncio.to_thread(queue.finish, job["id"], worker_id, result, error)
+        except sqlite3.OperationalError as e:
+            # The lease runs out and the job is handed out again
+            print(f"[{worker_id}] job {job['id']} could not be recorded: {e}")
+            return
+        if not recorded:
+            print(f"[{worker_id}] job {job['id']} lease had passed to another worker; outcome discarded")
+            return
+        print(f"[{worker_id}] job {job['id']} {'done' if result else 'failed'} (attempt {job['attempts']})")
+
+    print(f"[{worker_id}] Worker started, up to {concurrency} talks at once")
+    while True:
+        free = concurrency - len(running)
+        if free:
+            try:
+                jobs = await asyncio.to_thread(queue.lease, worker_id, free)
+            except sqlite3.OperationalError as e:
+                # Not a sign the queue is empty, so try again rather than exiting
+                print(f"[{worker_id}] Could not lease jobs: {e}")
+                await asyncio.sleep(idle_sleep)
+                continue
+            for job in jobs:
+                running[job["id"]] = asyncio.ensure_future(render(job))
+
+        if not running:
+            if exit_when_empty:
+                break
+            await asyncio.sleep(idle_sleep)
+            continue
+
+        done, _ = await asyncio.wait(list(running.values()), timeout=idle_sleep,
+                                     return_when=asyncio.FIRST_COMPLETED)
+        for job_id in [job_id for job_id, task in running.items() if task in done]:
+            del running[job_id]
+
+        if time.monotonic() - last_heartbeat >= heartbeat_every:
+            try:
+                await asyncio.to_thread(queue.heartbeat, list(running), worker_id)
+                last_heartbeat = time.monotonic()
+            except sqlite3.OperationalError as e:
+                print(f"[{worker_id}] Heartbeat failed, retrying: {e}")
+    print(f"[{worker_id}] Queue empty, worker exiting")
+
+
+def _worker_process(args):
+    # Each process builds its own generator, caches and SQLite connections
+    load_dotenv()
+    queue = RenderQueue(args.queue, visibility_timeout=args.visibility_timeout, max_attempts=args.max_attempts)
+    generator = AsyncVideoGenerator(os.getenv("BEARER_TOKEN"), max_concurrency=args.concurrency,
+                                    base_url=args.base_url, render_cache=RenderCache(),
+                                    talk_store=TalkStore())
+    try:
+        asyncio.run(run_worker(queue, generator, args.concurrency, exit_when_empty=args.exit_when_empty,
+                               budget=args.budget))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        generator.close()
+
+
+def _enqueue(args):
+    queue = RenderQueue(args.queue)
+    source = sys.stdin if args.manifest == "-" else open(args.manifest, encoding="utf-8")
+    count = 0
+    with source:
+        for line_number, line in enumerate(source, 1):
+            if not line.strip():
+                continue
+            try:
+                job = json.loads(line)
+            except json.JSONDecodeError as e:
+                print(f"Skipping line {line_number}: {e}", file=sys.stderr)
+                continue
+            if not job.get("input_text"):
+                print(f"Skipping line {line_number}: no input_text", file=sys.stderr)
+                continue
+            queue.enqueue({k: job[k] for k in JOB_FIELDS if job.get(k)}, name=job.get("id"))
+            count += 1
+    print(f"Enqueued {count} job(s); queue now {queue.counts()}", file=sys.stderr)
+
+
+def _work(args):
+    if args.processes <= 1:
+        _worker_process(args)
+        return
+    processes = [multiprocessing.Process(target=_worker_process, args=(args,)) for _ in range(args.processes)]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.join()
+
+
+def _results(args):
+    queue = RenderQueue(args.queue)
+    # Jobs finish out of ID order, so follow by finish time and skip the ones already printed
+    since = 0.0
+    printed = set()
+    while True:
+        for job in queue.finished(args.since, since):
+            if job["id"] in printed:
+                continue
+            print(json.dumps(job), flush=True)
+            printed.add(job["id"])
+            since = job["finished_at"]
+        if not args.follow:
+            break
+        time.sleep(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render queue for AI News Anchor videos")
+    parser.add_argument("--queue", default=".render_queue.sqlite3", help="Queue database file")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    enqueue = commands.add_parser("enqueue", help="Add the jobs in a JSONL manifest")
+    enqueue.add_argument("manifest", help="JSONL file, or - for stdin")
+
+    work = commands.add_parser("work", help="Run worker processes")
+    work.add_argument("--processes", type=int, default=1)
+    work.add_argument("--concurrency", type=int, default=16, help="Talks in flight per process")
+    work.add_argument("--visibility-timeout", type=float, default=900)
+    work.add_argument("--max-attempts", type=int, default=3)
+    work.add_argument("--budget", type=float, help="Seconds a job may take before it fails and is retried")
+    work.add_argument("--base-url", help="D-ID API base URL (e.g. the local stub_server.py)")
+    work.add_argument("--exit-when-empty", action="store_true")
+
+    results = commands.add_parser("results", help="Print finished jobs as JSONL")
+    results.add_argument("--since", type=int, default=0, help="Only jobs with a higher queue ID")
+    results.add_argument("--follow", action="store_true", help="Keep printing jobs as they finish")
+
+    args = parser.parse_args()
+    {"enqueue": _enqueue, "work": _work, "results": _results}[args.command](args)
+
+
+if __name__ == "__main__":
+    main()
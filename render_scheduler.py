@@ -0,0 +1,145 @@
+import itertools
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+# Priority lanes; lower values are rendered first
+PRIORITY_BREAKING = 0
+PRIORITY_NORMAL = 1
+PRIORITY_BACKLOG = 2
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket rate limiter.
+
+    Tokens refill at rate per second up to capacity; acquire() blocks until one is
+    available. pause() stops handing out tokens for a while, e.g. after a 429
+    Retry-After, so every caller sharing the bucket backs off together.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """Block until a token is available, then take it"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                elif self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                else:
+                    wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """Hand out no tokens for the next seconds"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0
+
+
+class RenderScheduler:
+    """
+    Runs VideoGenerator renders from a priority queue under D-ID rate limits.
+
+    /talks submissions and status polls each draw from their own token bucket,
+    429 responses pause the bucket for the Retry-After period, and at most
+    max_in_flight talks render at a time. Jobs in a lower priority lane (e.g.
+    PRIORITY_BREAKING) are always started before queued backlog jobs.
+    """
+
+    def __init__(self, video_generator, max_in_flight=4, submit_rate=0.5, submit_burst=2,
+                 poll_rate=2.0, poll_burst=5):
+        """
+        Args:
+            video_generator: VideoGenerator used for the renders
+            max_in_flight: Maximum number of talks rendering at once
+            submit_rate: Sustained /talks submissions per second
+            submit_burst: Submissions allowed back to back
+            poll_rate: Sustained status polls per second (shared by all talks)
+            poll_burst: Status polls allowed back to back
+        """
+        self.video_generator = video_generator
+        self.max_in_flight = max_in_flight
+        video_generator.submit_limiter = TokenBucket(submit_rate, submit_burst)
+        video_generator.poll_limiter = TokenBucket(poll_rate, poll_burst)
+
+        self._queue = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._stats = {"submitted": 0, "completed": 0, "failed": 0, "in_flight": 0}
+
+        self._workers = [
+            threading.Thread(target=self._worker, name=f"render-worker-{i}", daemon=True)
+            for i in range(max_in_flight)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, input_text, priority=PRIORITY_NORMAL, **kwargs):
+        """
+        Queue a render.
+
+        Args:
+            input_text: The script for the AI anchor to read
+            priority: PRIORITY_BREAKING, PRIORITY_NORMAL or PRIORITY_BACKLOG
+            **kwargs: Other generate_video arguments (source_url, voice_id, presenter_id)
+
+        Returns:
+            concurrent.futures.Future resolving to the video URL (or None if the render failed)
+        """
+        future = Future()
+        with self._lock:
+            self._stats["submitted"] += 1
+        # The sequence number keeps FIFO order within a lane
+        self._queue.put((priority, next(self._sequence), future, input_text, kwargs))
+        return future
+
+    def _worker(self):
+        while True:
+            priority, _, future, input_text, kwargs = self._queue.get()
+            if future is None:
+                return
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            with self._lock:
+                self._stats["in_flight"] += 1
+            try:
+                result = self.video_generator.generate_video(input_text, **kwargs)
+                future.set_result(result)
+            except Exception as e:
+                future.set_exception(e)
+                result = None
+            finally:
+                with self._lock:
+                    self._stats["in_flight"] -= 1
+                    self._stats["completed" if result else "failed"] += 1
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, queued=self._queue.qsize())
+
+    def shutdown(self, wait=True):
+        """Stop the workers once the jobs already queued have run"""
+        for _ in self._workers:
+            # Sorts after every real job
+            self._queue.put((float("inf"), next(self._sequence), None, None, None))
+        if wait:
+            for worker in self._workers:
+                worker.join()
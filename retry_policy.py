@@ -0,0 +1,142 @@
+import random
+import threading
+import time
+
+import requests
+from urllib3.exceptions import NewConnectionError
+
+
+class RetryBudget:
+    """
+    Token bucket that caps retries to a fraction of recent calls.
+
+    Every call deposits ratio tokens and every retry withdraws one, with a slow
+    refill of min_per_second so a quiet process can still retry now and then. When
+    D-ID is down for everyone, retries stop once the bucket is empty instead of
+    multiplying the load on it by the number of attempts.
+    """
+
+    def __init__(self, ratio=0.2, min_per_second=0.2, max_tokens=10):
+        """
+        Args:
+            ratio: Retries allowed per call made
+            min_per_second: Retries allowed per second regardless of traffic
+            max_tokens: Most retries that can be saved up
+        """
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_tokens = max_tokens
+        self._tokens = max_tokens
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _add(self, amount, now):
+        elapsed = now - self._updated
+        self._tokens = min(self.max_tokens, self._tokens + amount + elapsed * self.min_per_second)
+        self._updated = now
+
+    def deposit(self):
+        """Record a call"""
+        with self._lock:
+            self._add(self.ratio, time.monotonic())
+
+    def withdraw(self):
+        """Take a token for a retry; False if the budget is spent"""
+        with self._lock:
+            self._add(0, time.monotonic())
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+_shared_budget = None
+_shared_lock = threading.Lock()
+
+
+def shared_retry_budget():
+    """Return the process-wide RetryBudget, creating it on first use"""
+    global _shared_budget
+    with _shared_lock:
+        if _shared_budget is None:
+            _shared_budget = RetryBudget()
+        return _shared_budget
+
+
+def never_sent(error):
+    """True for connection errors raised before the request reached the server"""
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    if isinstance(error, requests.exceptions.ConnectionError) and error.args:
+        return isinstance(getattr(error.args[0], "reason", None), NewConnectionError)
+    return False
+
+
+class RetryPolicy:
+    """
+    Which failed D-ID calls are retried, and how long to wait before each retry.
+
+    Status checks are plain GETs and are retried on timeouts, connection errors and
+    the statuses in retry_statuses. A /talks POST is only resubmitted when D-ID
+    cannot have created the talk: the connection never opened, or the response
+    status is in submit_retry_statuses (throttled, or turned away by the gateway).
+    A POST that timed out waiting for its response, or got a 500, may have started
+    a talk, so resubmitting it could render and bill the same video twice.
+
+    Waits grow exponentially with full jitter (a random delay between zero and the
+    backoff ceiling) so clients that failed together don't retry together, and a
+    Retry-After header is honoured when D-ID sends one. Unless given its own, every
+    policy in the process draws from one shared RetryBudget, so retries are capped
+    across all generators rather than per instance.
+    """
+
+    def __init__(self, max_retries=3, base_delay=1.0, max_delay=30.0,
+                 retry_statuses=(408, 429, 500, 502, 503, 504), submit_retry_statuses=(429, 502, 503, 504),
+                 budget=None):
+        """
+        Args:
+            max_retries: Retries per call after the first attempt
+            base_delay: Backoff ceiling for the first retry, doubled for each one after
+            max_delay: Upper bound for the backoff ceiling
+            retry_statuses: HTTP statuses retried on status checks
+            submit_retry_statuses: HTTP statuses retried on /talks submissions
+            budget: RetryBudget the retries draw from (defaults to the process-wide one)
+        """
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_statuses = frozenset(retry_statuses)
+        self.submit_retry_statuses = frozenset(submit_retry_statuses)
+        self.budget = budget or shared_retry_budget()
+
+    def classify(self, endpoint, response=None, error=None):
+        """
+        Decide whether a call's outcome is worth retrying.
+
+        Args:
+            endpoint: "submit" for /talks POSTs; anything else is treated as an idempotent GET
+            response: The response, if one came back
+            error: The requests exception, if the call raised
+
+        Returns:
+            A short reason string if the call should be retried, otherwise None
+        """
+        submit = endpoint == "submit"
+        if error is not None:
+            if never_sent(error):
+                return "connection failed"
+            if submit:
+                return None
+            if isinstance(error, requests.exceptions.Timeout):
+                return "timed out"
+            if isinstance(error, requests.exceptions.ConnectionError):
+                return "connection error"
+            return None
+        statuses = self.submit_retry_statuses if submit else self.retry_statuses
+        if response is not None and response.status_code in statuses:
+            return f"{response.status_code} {response.reason or 'error'}"
+        return None
+
+    def backoff(self, retry):
+        """Seconds to wait before retry number retry (1-based), with full jitter"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (retry - 1)))
@@ -0,0 +1,129 @@
+import asyncio
+import hashlib
+import os
+import re
+
+from deadline import within
+from video_concat import concat_videos, download_video
+
+# Leading opening tags and trailing closing tags around the spoken text, e.g. the
+# <mstts:express-as style="..."> wrapper app.py adds for voice styles
+_WRAPPER_RE = re.compile(r'^\s*((?:<[^/!?][^>]*>\s*)*)(.*?)((?:\s*</[^>]+>)*)\s*$', re.DOTALL)
+
+# Sentence ends: Latin punctuation or the Devanagari danda, followed by whitespace
+_SENTENCE_RE = re.compile(r'(?<=[.!?।])\s+')
+
+
+def _pack(pieces, max_chars, separator):
+    """Greedily join pieces into chunks of at most max_chars (a single long piece stays whole)"""
+    chunks = []
+    current = ""
+    for piece in pieces:
+        candidate = f"{current}{separator}{piece}" if current else piece
+        if current and len(candidate) > max_chars:
+            chunks.append(current)
+            current = piece
+        else:
+            current = candidate
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def split_script(script, max_chars=600):
+    """
+    Split a script into segments on paragraph and sentence boundaries.
+
+    SSML wrappers around the whole script are repeated around every segment, so a
+    styled script keeps its style in each part.
+
+    Args:
+        script: Plain text or SSML-wrapped script
+        max_chars: Target maximum length of a segment's spoken text
+
+    Returns:
+        List of segment scripts (a single item if the script is already short)
+    """
+    prefix, body, suffix = _WRAPPER_RE.match(script).groups()
+    prefix, suffix = prefix.strip(), suffix.strip()
+
+    pieces = []
+    for paragraph in re.split(r'\n\s*\n', body.strip()):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if len(paragraph) <= max_chars:
+            pieces.append(paragraph)
+        else:
+            pieces.extend(_pack(_SENTENCE_RE.split(paragraph), max_chars, " "))
+
+    segments = _pack(pieces, max_chars, "\n\n")
+    return [f"{prefix}{segment}{suffix}" for segment in segments] or [script]
+
+
+class SegmentedRenderer:
+    """
+    Renders long scripts as several talks in parallel and stitches them locally.
+
+    Render time grows with script length, so splitting a bulletin into N segments and
+    rendering them concurrently cuts wall-clock time roughly N-fold. The finished
+    clips are downloaded and joined with ffmpeg (see video_concat.py).
+    """
+
+    def __init__(self, video_generator, output_dir=".segmented_renders", max_chars=600):
+        """
+        Args:
+            video_generator: AsyncVideoGenerator used to render the segments
+            output_dir: Directory for downloaded segments and stitched videos
+            max_chars: Target maximum length of each segment
+        """
+        self.video_generator = video_generator
+        self.output_dir = output_dir
+        self.max_chars = max_chars
+        os.makedirs(output_dir, exist_ok=True)
+
+    async def render_async(self, script, source_url=None, voice_id=None, presenter_id=None, budget=None):
+        """
+        Render a script segment by segment.
+
+        Args:
+            budget: Optional total seconds for all the segments (see deadline.py)
+
+        Returns:
+            URL of the video when the script fits in one segment, otherwise the path of
+            the stitched local MP4; None if any segment failed
+        """
+        if budget is not None:
+            with within(budget):
+                return await self.render_async(script, source_url, voice_id, presenter_id)
+
+        segments = split_script(script, self.max_chars)
+        if len(segments) == 1:
+            return await self.video_generator.generate_video(script, source_url, voice_id, presenter_id)
+
+        print(f"Rendering script in {len(segments)} segments")
+        jobs = [
+            {"input_text": segment, "source_url": source_url, "voice_id": voice_id, "presenter_id": presenter_id}
+            for segment in segments
+        ]
+        results = await self.video_generator.generate_many(jobs)
+        if not all(results):
+            print(f"Error: {results.count(None)} of {len(segments)} segments failed to render")
+            return None
+
+        name = hashlib.sha256("\0".join(results).encode("utf-8")).hexdigest()[:16]
+        # asyncio.to_thread carries the context over, so the downloads and the concat
+        # stay under the deadline
+        paths = await asyncio.gather(*(
+            asyncio.to_thread(download_video, result, os.path.join(self.output_dir, f"{name}-{index:03d}.mp4"))
+            for index, result in enumerate(results)
+        ))
+        if not all(paths):
+            return None
+
+        output_path = os.path.join(self.output_dir, f"{name}.mp4")
+        return await asyncio.to_thread(concat_videos, paths, output_path)
+
+    def render(self, script, source_url=None, voice_id=None, presenter_id=None, budget=None):
+        """Blocking version of render_async"""
+        return asyncio.run(self.render_async(script, source_url, voice_id, presenter_id, budget))
@@ -66,7 +66,7 @@ for method_name, auth_header in auth_methods:
     }
     
     try:
-        response = requests.post(url, json=payload, headers=headers)
+        response = requests.post(url, json=payload, headers=headers, timeout=30)
         print(f"Status Code: {response.status_code}")
         
         if response.status_code == 201 or response.status_code == 200:
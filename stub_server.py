@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the D-ID and NewsAPI endpoints, for load and soak testing
+
+Implements POST/GET /talks (created -> started -> done/error/rejected), POST /images, GET /presenters,
+GET /credits, GET /v2/everything and the result video downloads, with configurable
+render latency, error injection and throttling. No credits or quota are spent.
+
+Usage:
+    python stub_server.py --port 8089 --render-latency lognormal:20,0.4 --error-rate 0.02
+Then point the clients at it:
+    VideoGenerator(api_key, base_url="http://127.0.0.1:8089")
+    NewsAPI(api_key, base_url="http://127.0.0.1:8089")
+"""
+
+import argparse
+import itertools
+import json
+import math
+import random
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# Served for every result_url; clients only need bytes to download
+FAKE_VIDEO = b"\x00\x00\x00\x18ftypmp42" + b"\x00" * 4096
+
+
+def _iso(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+class Latency:
+    """
+    Random latency distribution parsed from "fixed:S", "uniform:LO,HI" or "lognormal:MEDIAN,SIGMA"
+    """
+
+    def __init__(self, spec, rng):
+        kind, _, params = spec.partition(":")
+        self.kind = kind
+        self.params = [float(p) for p in params.split(",") if p]
+        self.rng = rng
+        if kind not in ("fixed", "uniform", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {spec}")
+
+    def sample(self):
+        if self.kind == "fixed":
+            return self.params[0]
+        if self.kind == "uniform":
+            return self.rng.uniform(self.params[0], self.params[1])
+        median, sigma = self.params
+        return self.rng.lognormvariate(math.log(median), sigma)
+
+
+class StubConfig:
+    def __init__(self, render_latency="lognormal:15,0.3", queue_latency="uniform:0.5,2",
+                 seconds_per_char=0.0, error_rate=0.0, throttle_rate=0.0, reject_rate=0.0,
+                 render_error_rate=0.0, max_rps=0.0, retry_after=1, credits=10000,
+                 total_articles=500, response_delay=0.0, seed=None):
+        """
+        Args:
+            render_latency: Distribution of seconds from "started" to "done"
+            queue_latency: Distribution of seconds from "created" to "started"
+            seconds_per_char: Extra render seconds per character of script
+            error_rate: Fraction of requests answered with 500
+            throttle_rate: Fraction of requests answered with 429 (in addition to max_rps)
+            reject_rate: Fraction of talks that end in "rejected"
+            render_error_rate: Fraction of talks that end in "error"
+            max_rps: Requests per second accepted before answering 429 (0 = unlimited)
+            retry_after: Retry-After seconds sent with 429 responses
+            credits: Starting credit balance reported by /credits
+            total_articles: totalResults reported by /v2/everything
+            response_delay: Seconds added to every response (network/server latency)
+            seed: Random seed for reproducible runs
+        """
+        self.rng = random.Random(seed)
+        self.render_latency = Latency(render_latency, self.rng)
+        self.queue_latency = Latency(queue_latency, self.rng)
+        self.seconds_per_char = seconds_per_char
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.reject_rate = reject_rate
+        self.render_error_rate = render_error_rate
+        self.max_rps = max_rps
+        self.retry_after = retry_after
+        self.credits = credits
+        self.total_articles = total_articles
+        self.response_delay = response_delay
+
+
+PRESENTERS = [
+    {"id": "amy-Aq6OmGZnMt", "name": "Amy", "gender": "female"},
+    {"id": "anna-R5OMsEJ3DK", "name": "Anna", "gender": "female"},
+    {"id": "bella-lux-VbmPiYLq5M", "name": "Bella", "gender": "female"},
+    {"id": "fatha-rK5XHPPvRT", "name": "Fatha", "gender": "female"},
+    {"id": "josh-WNqtJIgqUp", "name": "Josh", "gender": "male"},
+    {"id": "matt-zcSXHQnCml", "name": "Matt", "gender": "male"},
+    {"id": "noelle-8Iy3QSlXV7", "name": "Noelle", "gender": "female"},
+]
+
+
+class StubState:
+    """Talks, credits and request counters shared by all handler threads"""
+
+    def __init__(self, config):
+        self.config = config
+        self.lock = threading.Lock()
+        self.talks = {}
+        self.ids = itertools.count(1)
+        self.credits_used = 0
+        self.counts = {}
+        self._window_start = time.monotonic()
+        self._window_count = 0
+
+    def count(self, name):
+        with self.lock:
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+    def throttled(self):
+        """Decide whether this request should get a 429"""
+        config = self.config
+        with self.lock:
+            if config.throttle_rate and config.rng.random() < config.throttle_rate:
+                return True
+            if not config.max_rps:
+                return False
+            now = time.monotonic()
+            if now - self._window_start >= 1.0:
+                self._window_start = now
+                self._window_count = 0
+            self._window_count += 1
+            return self._window_count > config.max_rps
+
+    def failed(self):
+        with self.lock:
+            return self.config.error_rate and self.config.rng.random() < self.config.error_rate
+
+    def create_talk(self, payload):
+        config = self.config
+        script = payload.get("script", {}).get("input", "")
+        with self.lock:
+            talk_id = f"tlk_stub{next(self.ids)}"
+            now = time.time()
+            started_at = now + config.queue_latency.sample()
+            finished_at = started_at + config.render_latency.sample() + len(script) * config.seconds_per_char
+            roll = config.rng.random()
+            if roll < config.reject_rate:
+                outcome = "rejected"
+            elif roll < config.reject_rate + config.render_error_rate:
+                outcome = "error"
+            else:
+                outcome = "done"
+            self.talks[talk_id] = {
+                "created_at": now,
+                "started_at": started_at,
+                "finished_at": finished_at,
+                "outcome": outcome,
+                "length": len(script),
+            }
+            self.credits_used += 1
+        return talk_id
+
+    def talk_status(self, talk_id, base_url):
+        with self.lock:
+            talk = self.talks.get(talk_id)
+        if talk is None:
+            return None
+
+        now = time.time()
+        body = {"id": talk_id, "created_at": _iso(talk["created_at"]), "modified_at": _iso(talk["created_at"])}
+        if now < talk["started_at"]:
+            body["status"] = "created"
+        elif now < talk["finished_at"]:
+            body["status"] = "started"
+            body["started_at"] = body["modified_at"] = _iso(talk["started_at"])
+        else:
+            body["status"] = talk["outcome"]
+            body["started_at"] = _iso(talk["started_at"])
+            body["modified_at"] = _iso(talk["finished_at"])
+            if talk["outcome"] == "done":
+                body["result_url"] = f"{base_url}/results/{talk_id}.mp4"
+                body["duration"] = round(talk["length"] / 15.0, 2)
+            else:
+                body["error"] = {"kind": "StubError", "description": f"Injected {talk['outcome']} status"}
+        return body
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 keeps connections alive, like the real APIs
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without TCP_NODELAY every
+    # keep-alive response stalls on delayed ACKs
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def state(self):
+        return self.server.state
+
+    def _send_json(self, status, body, headers=None):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _injected_failure(self):
+        """Apply configured delay, throttling and error injection; True if a response was sent"""
+        config = self.state.config
+        if config.response_delay:
+            time.sleep(config.response_delay)
+        if self.state.throttled():
+            self.state.count("429")
+            self._send_json(429, {"kind": "TooManyRequests"}, {"Retry-After": str(config.retry_after)})
+            return True
+        if self.state.failed():
+            self.state.count("500")
+            self._send_json(500, {"kind": "InternalServerError", "description": "Injected failure"})
+            return True
+        return False
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        self.state.count(f"POST {path}")
+
+        if path not in ("/talks", "/images"):
+            self._send_json(404, {"kind": "NotFound"})
+            return
+        if self._injected_failure():
+            return
+        if path == "/images":
+            if not raw:
+                self._send_json(400, {"kind": "ValidationError", "description": "image required"})
+                return
+            with self.state.lock:
+                image_id = f"img_stub{next(self.state.ids)}"
+            self._send_json(201, {"id": image_id, "url": f"s3://d-id-images-stub/{image_id}.png"})
+            return
+        try:
+            payload = json.loads(raw or b"{}")
+        except json.JSONDecodeError:
+            self._send_json(400, {"kind": "ValidationError", "description": "Invalid JSON"})
+            return
+        if "source_url" not in payload and "presenter_id" not in payload:
+            self._send_json(400, {"kind": "ValidationError", "description": "source_url or presenter_id required"})
+            return
+
+        talk_id = self.state.create_talk(payload)
+        self._send_json(201, {"id": talk_id, "status": "created", "object": "talk"})
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        path = url.path
+        base_url = f"http://{self.headers.get('Host')}"
+
+        results = re.fullmatch(r"/results/(tlk_\w+)\.mp4", path)
+        if results:
+            self.state.count("GET /results")
+            self.send_response(200)
+            self.send_header("Content-Type", "video/mp4")
+            self.send_header("Content-Length", str(len(FAKE_VIDEO)))
+            self.end_headers()
+            self.wfile.write(FAKE_VIDEO)
+            return
+
+        talk = re.fullmatch(r"/talks/(tlk_\w+)", path)
+        self.state.count("GET /talks/{id}" if talk else f"GET {path}")
+        if self._injected_failure():
+            return
+
+        if talk:
+            body = self.state.talk_status(talk.group(1), base_url)
+            if body is None:
+                self._send_json(404, {"kind": "NotFoundError", "description": "talk not found"})
+            else:
+                self._send_json(200, body)
+        elif path == "/presenters":
+            self._send_json(200, {"presenters": PRESENTERS})
+        elif path == "/credits":
+            with self.state.lock:
+                used = self.state.credits_used
+            total = self.state.config.credits
+            self._send_json(200, {"remaining": max(0, total - used), "total": total, "used": used})
+        elif path == "/v2/everything":
+            self._everything(parse_qs(url.query))
+        else:
+            self._send_json(404, {"kind": "NotFound"})
+
+    def _everything(self, query):
+        q = query.get("q", ["news"])[0]
+        page_size = min(100, int(query.get("pageSize", ["20"])[0]))
+        page = int(query.get("page", ["1"])[0])
+        total = self.state.config.total_articles
+
+        etag = f'"{q}-{page_size}-{page}-{total}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        start = (page - 1) * page_size
+        articles = []
+        for i in range(start, min(start + page_size, total)):
+            articles.append({
+                "source": {"id": None, "name": f"Stub Source {i % 20}"},
+                "author": f"Author {i % 50}",
+                "title": f"{q.title()} headline {i}",
+                "description": f"Summary of {q} story number {i}.",
+                "url": f"https://news.example.com/{q}/{i}",
+                "urlToImage": f"https://news.example.com/{q}/{i}.jpg",
+                "publishedAt": "2024-08-30T12:00:00Z",
+                "content": f"Full text of {q} story {i}. " * 10,
+            })
+        self._send_json(200, {"status": "ok", "totalResults": total, "articles": articles}, {"ETag": etag})
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address=("127.0.0.1", 0), config=None):
+        super().__init__(address, StubHandler)
+        self.state = StubState(config or StubConfig())
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Serve on a background thread (for use from benchmarks and tests)"""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return self
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local D-ID / NewsAPI stand-in server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--render-latency", default="lognormal:15,0.3",
+                        help="fixed:S, uniform:LO,HI or lognormal:MEDIAN,SIGMA (seconds)")
+    parser.add_argument("--queue-latency", default="uniform:0.5,2")
+    parser.add_argument("--seconds-per-char", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 500")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--reject-rate", type=float, default=0.0, help="Fraction of talks ending 'rejected'")
+    parser.add_argument("--render-error-rate", type=float, default=0.0, help="Fraction of talks ending 'error'")
+    parser.add_argument("--max-rps", type=float, default=0.0, help="Requests per second before 429s (0 = unlimited)")
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--response-delay", type=float, default=0.0)
+    parser.add_argument("--total-articles", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    config = StubConfig(
+        render_latency=args.render_latency, queue_latency=args.queue_latency,
+        seconds_per_char=args.seconds_per_char, error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate, reject_rate=args.reject_rate,
+        render_error_rate=args.render_error_rate, max_rps=args.max_rps,
+        retry_after=args.retry_after, total_articles=args.total_articles,
+        response_delay=args.response_delay, seed=args.seed
+    )
+    server = StubServer((args.host, args.port), config)
+    print(f"Stub D-ID/NewsAPI server listening on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nRequest counts:", json.dumps(server.state.counts, indent=2))
+
+
+if __name__ == "__main__":
+    main()
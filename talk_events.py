@@ -0,0 +1,102 @@
+import contextvars
+from contextlib import contextmanager
+
+
+class TalkEvent:
+    """Base class for the progress events yielded by VideoGenerator.stream_video"""
+
+    kind = "event"
+    __slots__ = ()
+
+    def to_dict(self):
+        return {"event": self.kind, **{name: getattr(self, name) for name in self.__slots__}}
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+class Submitted(TalkEvent):
+    """D-ID accepted the talk (resumed is True when an earlier identical talk was picked up)"""
+
+    kind = "submitted"
+    __slots__ = ("talk_id", "resumed")
+
+    def __init__(self, talk_id, resumed=False):
+        self.talk_id = talk_id
+        self.resumed = resumed
+
+
+class StatusChanged(TalkEvent):
+    """The talk's D-ID status changed, e.g. created -> started"""
+
+    kind = "status"
+    __slots__ = ("talk_id", "status", "attempt")
+
+    def __init__(self, talk_id, status, attempt):
+        self.talk_id = talk_id
+        self.status = status
+        self.attempt = attempt
+
+
+class Retry(TalkEvent):
+    """A request is being retried after delay seconds"""
+
+    kind = "retry"
+    __slots__ = ("reason", "delay", "attempt")
+
+    def __init__(self, reason, delay, attempt):
+        self.reason = reason
+        self.delay = delay
+        self.attempt = attempt
+
+
+class Done(TalkEvent):
+    """
+    The video is ready.
+
+    result_url is the video URL (or local path when it came from the render cache),
+    duration the video length in seconds if D-ID reported it, elapsed the seconds
+    since submission if this call submitted or resumed the talk.
+    """
+
+    kind = "done"
+    __slots__ = ("talk_id", "result_url", "duration", "elapsed")
+
+    def __init__(self, talk_id, result_url, duration=None, elapsed=None):
+        self.talk_id = talk_id
+        self.result_url = result_url
+        self.duration = duration
+        self.elapsed = elapsed
+
+
+class Failed(TalkEvent):
+    """The render failed, was rejected, timed out or was cancelled"""
+
+    kind = "failed"
+    __slots__ = ("talk_id", "error")
+
+    def __init__(self, talk_id, error):
+        self.talk_id = talk_id
+        self.error = error
+
+
+# Callable receiving the events of the render running in the current context
+_sink = contextvars.ContextVar("talk_event_sink", default=None)
+
+
+def emit(event):
+    """Pass an event to the listener of the current context, if there is one"""
+    sink = _sink.get()
+    if sink is not None:
+        sink(event)
+
+
+@contextmanager
+def listening(sink):
+    """Send events emitted in this context (and tasks/threads started with a copy of it) to sink"""
+    token = _sink.set(sink)
+    try:
+        yield
+    finally:
+        _sink.reset(token)
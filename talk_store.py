@@ -0,0 +1,113 @@
+import sqlite3
+import threading
+import time
+
+
+class TalkStore:
+    """
+    Durable record of every talk submitted to D-ID.
+
+    The talk ID is written to SQLite as soon as /talks returns it, before polling
+    starts, so a process that dies mid-render can pick the talk up again on restart
+    instead of submitting (and paying for) it a second time. Rows are keyed on the
+    talk ID and indexed by a hash of the normalized payload, which lets an identical
+    request reuse a talk that is still rendering or has recently finished.
+    """
+
+    def __init__(self, db_path=".talk_store.sqlite3", result_ttl=12 * 3600, max_age=48 * 3600):
+        """
+        Args:
+            db_path: SQLite file holding the talks
+            result_ttl: Seconds a finished talk's result_url is reused for an identical payload
+                        (D-ID's result links expire, so keep this under a day)
+            max_age: Seconds after which an unfinished talk is no longer resumed
+        """
+        self.result_ttl = result_ttl
+        self.max_age = max_age
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS talks (
+                talk_id TEXT PRIMARY KEY,
+                payload_key TEXT NOT NULL,
+                input_text TEXT,
+                status TEXT NOT NULL,
+                result_url TEXT,
+                submitted_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS talks_payload ON talks (payload_key, submitted_at)")
+        self._db.commit()
+
+    @staticmethod
+    def _row(row):
+        if row is None:
+            return None
+        talk_id, payload_key, input_text, status, result_url, submitted_at, updated_at = row
+        return {
+            "talk_id": talk_id,
+            "payload_key": payload_key,
+            "input_text": input_text,
+            "status": status,
+            "result_url": result_url,
+            "submitted_at": submitted_at,
+            "updated_at": updated_at,
+        }
+
+    def record_submitted(self, payload_key, talk_id, input_text):
+        """Remember a talk D-ID has just accepted"""
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO talks (talk_id, payload_key, input_text, status, result_url, "
+                "submitted_at, updated_at) VALUES (?, ?, ?, 'submitted', NULL, ?, ?)",
+                (talk_id, payload_key, input_text, now, now),
+            )
+            self._db.commit()
+
+    def update(self, talk_id, status, result_url=None):
+        """Record a talk's final status: done, error, rejected, timeout or cancelled"""
+        with self._lock:
+            self._db.execute(
+                "UPDATE talks SET status = ?, result_url = ?, updated_at = ? WHERE talk_id = ?",
+                (status, result_url, time.time(), talk_id),
+            )
+            self._db.commit()
+
+    def find(self, payload_key):
+        """
+        Look for a talk an identical payload can reuse.
+
+        Returns:
+            The newest row that is still rendering or finished successfully within
+            result_ttl, or None
+        """
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT talk_id, payload_key, input_text, status, result_url, submitted_at, updated_at "
+                "FROM talks WHERE payload_key = ? AND ("
+                "  (status = 'submitted' AND submitted_at > ?) OR"
+                "  (status = 'done' AND result_url IS NOT NULL AND updated_at > ?)"
+                ") ORDER BY submitted_at DESC LIMIT 1",
+                (payload_key, now - self.max_age, now - self.result_ttl),
+            ).fetchone()
+        return self._row(row)
+
+    def outstanding(self):
+        """Talks that were submitted but never reached a final status, oldest first"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT talk_id, payload_key, input_text, status, result_url, submitted_at, updated_at "
+                "FROM talks WHERE status = 'submitted' AND submitted_at > ? ORDER BY submitted_at",
+                (time.time() - self.max_age,),
+            ).fetchall()
+        return [self._row(row) for row in rows]
+
+    def purge(self, older_than=7 * 24 * 3600):
+        """Delete talks submitted more than older_than seconds ago"""
+        with self._lock:
+            self._db.execute("DELETE FROM talks WHERE submitted_at < ?", (time.time() - older_than,))
+            self._db.commit()
@@ -34,7 +34,7 @@ headers1 = {
 }
 
 try:
-    response = requests.get("https://api.d-id.com/credits", headers=headers1)
+    response = requests.get("https://api.d-id.com/credits", headers=headers1, timeout=30)
     print(f"   Status: {response.status_code}")
     if response.status_code == 200:
         print("   ✅ Success with Bearer format!")
@@ -54,7 +54,7 @@ headers2 = {
 }
 
 try:
-    response = requests.get("https://api.d-id.com/credits", headers=headers2)
+    response = requests.get("https://api.d-id.com/credits", headers=headers2, timeout=30)
     print(f"   Status: {response.status_code}")
     if response.status_code == 200:
         print("   ✅ Success with Basic format!")
@@ -88,7 +88,7 @@ headers = {
 }
 
 try:
-    response = requests.post(url, json=payload, headers=headers)
+    response = requests.post(url, json=payload, headers=headers, timeout=30)
     print(f"   Basic auth - Status: {response.status_code}")
     if response.status_code in [200, 201]:
         print("   ✅ Success with Basic auth!")
@@ -96,7 +96,7 @@ try:
     else:
         # Try with Bearer
         headers["authorization"] = f"Bearer {api_key}"
-        response = requests.post(url, json=payload, headers=headers)
+        response = requests.post(url, json=payload, headers=headers, timeout=30)
         print(f"   Bearer auth - Status: {response.status_code}")
         if response.status_code in [200, 201]:
             print("   ✅ Success with Bearer auth!")
@@ -0,0 +1,80 @@
+import os
+import shutil
+import subprocess
+import tempfile
+
+import requests
+
+from deadline import DeadlineExceeded, capped
+from http_transport import shared_transport
+
+# Seconds ffmpeg may take to join the clips when no deadline is in force
+CONCAT_TIMEOUT = 600
+
+
+def download_video(video, dest_path, transport=None):
+    """
+    Make a rendered video available as a local file.
+
+    Args:
+        video: Result URL from D-ID, or a local path (e.g. from the render cache)
+        dest_path: Where to write the file when video is a URL
+
+    Returns:
+        Local path of the video, or None if the download failed
+    """
+    if os.path.exists(video):
+        return video
+
+    transport = transport or shared_transport()
+    try:
+        with transport.get(video, stream=True) as response:
+            response.raise_for_status()
+            with open(dest_path, "wb") as f:
+                for chunk in response.iter_content(chunk_size=1024 * 1024):
+                    f.write(chunk)
+    except (requests.exceptions.RequestException, DeadlineExceeded, OSError) as e:
+        print(f"Failed to download {video}: {e}")
+        return None
+    return dest_path
+
+
+def concat_videos(paths, output_path):
+    """
+    Join MP4 files end to end with ffmpeg's concat demuxer.
+
+    The clips all come from D-ID with the same codecs and encoding settings, so the
+    streams are copied rather than re-encoded.
+
+    ffmpeg is given CONCAT_TIMEOUT seconds, or the time left under the current
+    deadline if that is shorter.
+
+    Returns:
+        output_path, or None if ffmpeg is missing, failed or ran out of time
+    """
+    if not shutil.which("ffmpeg"):
+        print("Error: ffmpeg not found on PATH; it is required to join video segments")
+        return None
+
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as list_file:
+        for path in paths:
+            escaped = os.path.abspath(path).replace("'", "'\\''")
+            list_file.write(f"file '{escaped}'\n")
+        list_path = list_file.name
+
+    try:
+        result = subprocess.run(
+            ["ffmpeg", "-y", "-loglevel", "error", "-f", "concat", "-safe", "0",
+             "-i", list_path, "-c", "copy", output_path],
+            capture_output=True, text=True, timeout=capped(CONCAT_TIMEOUT)
+        )
+    except subprocess.TimeoutExpired:
+        print(f"ffmpeg concat did not finish in time: {output_path}")
+        return None
+    finally:
+        os.remove(list_path)
+
+    if result.returncode != 0:
+        print(f"ffmpeg concat failed: {result.stderr.strip()}")
+        return None
+    return output_path